@@ -23,6 +23,24 @@ app.include_router(schedule.router)
 app.include_router(reports.router)
 app.include_router(admin.router)
 
+# Load the persisted priority model so schedule requests only run predict()
+from app.services.model_registry import model_registry
+
+@app.on_event("startup")
+def load_priority_model():
+    model_registry.load_latest()
+
+# Build the login and contact indexes before the first MR logs in
+from app.services.lookups import user_index, contact_index
+
+@app.on_event("startup")
+def warm_lookups():
+    try:
+        user_index.refresh()
+        contact_index.refresh()
+    except Exception as e:
+        print(f"[LOOKUP] Warm-up failed, will build on first use: {e}")
+
 # Root endpoint check
 @app.get("/")
 def home():
@@ -1,12 +1,23 @@
 from fastapi import APIRouter, HTTPException
 from typing import Optional, Dict, Any
 import pandas as pd
-from app.services.supabase_db import load_data, save_data
-from app.services.logic import run_schedule_logic_for_single_mr
+from app.services.supabase_db import (
+    load_data, load_page, fetch_data, save_data, table_columns, BulkWriteError,
+    publish_snapshot, get_snapshot_info, rollback_snapshot, diff_snapshots, log_schedule_run, table_cache
+)
+from app.services.logic import (
+    run_schedule_logic_for_fleet, run_schedule_logic_for_single_mr, schedule_window, resolve_seed,
+    ROUTING_BACKENDS, zone_cache
+)
+from app.services.travel_cache import travel_cache
+from app.services.jobs import job_manager
+import time
 import traceback
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+SCHEDULE_MODES = ("full", "rolling")
+
 # --------------------------------------------------
 # GET /admin/mrs - List of MRs for dropdown (ADMIN ONLY)
 # --------------------------------------------------
@@ -15,16 +26,11 @@ def get_all_mrs():
     print("[GET MRS] STARTED - Fetching MR list for dropdown")
 
     try:
-        df = load_data("User_Master")
-        print(f"[GET MRS] User_Master loaded - {len(df)} rows")
-
-        if df.empty:
-            print("[GET MRS] Sheet is empty - returning []")
-            return []
+        user_columns = table_columns("User_Master")
 
         # Find mr_id column (flexible)
         mr_id_col = None
-        for col in df.columns:
+        for col in user_columns:
             if 'mr_id' in col.lower() or 'mrid' in col.lower():
                 mr_id_col = col
                 break
@@ -33,6 +39,15 @@ def get_all_mrs():
             print("[GET MRS] No mr_id column found - returning []")
             return []
 
+        # Only the id + name columns are needed for the dropdown
+        name_cols = [c for c in ('name', 'first_name', 'last_name') if c in user_columns]
+        df = load_data("User_Master", columns=[mr_id_col] + name_cols)
+        print(f"[GET MRS] User_Master loaded - {len(df)} rows")
+
+        if df.empty:
+            print("[GET MRS] Sheet is empty - returning []")
+            return []
+
         # Clean mr_id
         df[mr_id_col] = df[mr_id_col].astype(str).str.strip()
         df = df[df[mr_id_col].notna() & (df[mr_id_col] != '') & (df[mr_id_col] != 'nan')]
@@ -61,38 +76,284 @@ def get_all_mrs():
 
 
 # --------------------------------------------------
-# POST /admin/generate-schedule
+# POST /admin/generate-schedule - starts a background job
 # --------------------------------------------------
-@router.post("/generate-schedule")
-def generate_schedule():
+@router.post("/generate-schedule", status_code=202)
+def generate_schedule(backend: Optional[str] = None, workers: Optional[int] = None, mode: str = "full",
+                      seed: Optional[int] = None):
+    """
+    Start regenerating Master_Schedule in the background and return the job id.
+    `backend` selects the routing backend (osrm | haversine), `workers` the number of
+    schedule processes (default SCHEDULE_WORKERS). Poll GET /admin/jobs/{job_id} for progress.
+    mode="full" replans the next 30 days; mode="rolling" keeps existing rows, plans only days
+    that have none (normally just the newly uncovered day) and backfills cancelled visits.
+    `seed` makes the run reproducible (default: SCHEDULE_SEED or a random seed); the seed used is
+    returned and recorded in schedule_runs (and with the published snapshot in full mode).
+    """
+    if mode not in SCHEDULE_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown mode '{mode}' (expected one of {', '.join(SCHEDULE_MODES)})")
+    if backend and backend.lower() not in ROUTING_BACKENDS:
+        raise HTTPException(status_code=400, detail=f"Unknown routing backend '{backend}'")
+    if workers is not None and workers < 1:
+        raise HTTPException(status_code=400, detail="workers must be >= 1")
+
+    seed = resolve_seed(seed)
+    try:
+        job = job_manager.submit(
+            "generate-schedule",
+            lambda job: _generate_schedule(job, backend, workers, seed, rolling=mode == "rolling"),
+            params={"backend": backend, "workers": workers, "mode": mode, "seed": seed},
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"job_id": job.id, "status": job.status, "seed": seed, "message": "Schedule generation started"}
+
+
+def _write_result(message, written, seed, run=None):
+    return {
+        "message": message,
+        "seed": seed,
+        "run_id": run.get("id") if run else None,  # schedule_runs row holding the seed
+        "rows_written": written["rows_written"] if written else 0,
+        "rows_failed": written["rows_failed"] if written else 0,
+    }
+
+
+def _generate_schedule(job, backend, workers, seed, start_date=None, end_date=None, rolling=False):
+    """
+    Body of the generate-schedule job: load, build per MR, publish.
+    With a date window only that window is regenerated and upserted in place;
+    in rolling mode only the new rows are appended.
+    """
+    job.set_stage("loading", "Loading users, contacts and activities")
+    users = load_data("User_Master")
+    contacts = load_data("Contacts")
+    activities = load_data("Activities")
+
+    current_date = pd.Timestamp.now().normalize()
+    window_start, window_end = (d.strftime('%Y-%m-%d') for d in schedule_window(current_date, start_date, end_date))
+
+    existing = None
+    if rolling:
+        # Must not come back empty on a failed read: every row would look new and be appended again
+        existing = fetch_data(
+            "Master_Schedule",
+            columns=["activity_id", "mr_id", "date", "customer_id", "status", "end_time", "latitude", "longitude"],
+            filters={"date__gte": window_start, "date__lte": window_end}
+        )
+
+    # Features and zone scores are shared across MRs inside the fleet engine
+    job.set_stage("building", "Building MR schedules")
+    all_schedules = run_schedule_logic_for_fleet(
+        users, contacts, activities, current_date, routing=backend, workers=workers, progress=job.update,
+        start_date=start_date, end_date=end_date, existing=existing, seed=seed
+    )
+
+    if not all_schedules:
+        return _write_result("No schedule generated" if not rolling else "Schedule already up to date", None, seed)
+
+    final = pd.concat(all_schedules, ignore_index=True)
+    final['date'] = final['date'].astype(str)
+
+    # Last cancellation point: publication itself is not interrupted
+    job.set_stage("publishing", f"Writing {len(final)} rows")
+    if rolling:
+        # Existing rows (Done, moved, Pending) are never rewritten: only new days and backfills
+        written = save_data(final, "Master_Schedule", mode="append")
+        run = log_schedule_run("rolling", seed, window_start, window_end, written["rows_written"],
+                               meta={"mrs": len(all_schedules)})
+        return _write_result(f"Rolling update: {len(final)} new activities for {len(all_schedules)} MRs", written, seed, run)
+    if start_date or end_date:
+        # Partial window: rows outside it (earlier and later days) must survive, so upsert in place
+        window = {"date__gte": window_start, "date__lte": window_end}
+        written = save_data(final, "Master_Schedule", mode="upsert", key="activity_id", scope=window)
+        run = log_schedule_run("window", seed, window_start, window_end, written["rows_written"],
+                               meta={"mrs": len(all_schedules)})
+        return _write_result(f"Schedule regenerated for {len(all_schedules)} MRs ({window_start} to {window_end})", written, seed, run)
+    try:
+        # Publish as a new snapshot (earlier days carried over) and flip readers atomically
+        pointer = publish_snapshot(final, "Master_Schedule", keep={"date__lt": window_start},
+                                   meta={"seed": seed, "window": [window_start, window_end], "mrs": len(all_schedules)})
+        written = {"rows_written": pointer["row_count"], "rows_failed": 0}
+        run_meta = {"mrs": len(all_schedules), "snapshot_id": pointer["snapshot_id"]}
+    except BulkWriteError:
+        raise
+    except RuntimeError as e:
+        print(f"[GENERATE SCHEDULE] Snapshot publish unavailable ({e}); upserting in place")
+        # Only the regenerated window is diffed/replaced; earlier days stay for reports
+        window = {"date__gte": window_start, "date__lte": window_end}
+        written = save_data(final, "Master_Schedule", mode="upsert", key="activity_id", scope=window)
+        run_meta = {"mrs": len(all_schedules)}
+
+    run = log_schedule_run("full", seed, window_start, window_end, written["rows_written"], meta=run_meta)
+    return _write_result(f"Schedule generated for {len(all_schedules)} MRs!", written, seed, run)
+
+
+# --------------------------------------------------
+# POST /admin/reschedule - one MR and/or a date window
+# --------------------------------------------------
+@router.post("/reschedule")
+def reschedule(mr_id: Optional[str] = None, start_date: Optional[str] = None, end_date: Optional[str] = None,
+               backend: Optional[str] = None, workers: Optional[int] = None, seed: Optional[int] = None):
+    """
+    Regenerate part of Master_Schedule; only rows of that MR / window are rewritten.
+    With `mr_id` the run is synchronous and loads just the MR's zone (zone scores come from
+    zone_cache when a previous run already scored it). Without `mr_id` the window is regenerated
+    for the whole fleet as a background job (same as generate-schedule).
+    With the same `seed` and data, an MR gets the same schedule as in a fleet run.
+    """
+    if not mr_id and not (start_date or end_date):
+        raise HTTPException(status_code=400, detail="Give an mr_id and/or a start_date/end_date window")
+    if backend and backend.lower() not in ROUTING_BACKENDS:
+        raise HTTPException(status_code=400, detail=f"Unknown routing backend '{backend}'")
     try:
-        users = load_data("User_Master")
-        contacts = load_data("Contacts")
-        activities = load_data("Activities")
-        
-        all_schedules = []
         current_date = pd.Timestamp.now().normalize()
-        
-        for _, user in users.iterrows():
-            # Flexible column name for MR ID
-            mr_id = user.get('mr_id') or user.get('MR_ID') or user.get('Mr_id')
-            if not mr_id:
-                continue
-            sched = run_schedule_logic_for_single_mr(
-                mr_id, users, contacts, activities, current_date
+        window_start, window_end = schedule_window(current_date, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {e}")
+    if window_start > window_end:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    seed = resolve_seed(seed)
+
+    if not mr_id:
+        try:
+            job = job_manager.submit(
+                "generate-schedule",
+                lambda job: _generate_schedule(job, backend, workers, seed, window_start, window_end),
+                params={"backend": backend, "workers": workers, "seed": seed,
+                        "start_date": str(window_start.date()), "end_date": str(window_end.date())},
             )
-            if not sched.empty:
-                all_schedules.append(sched)
-        
-        if all_schedules:
-            final = pd.concat(all_schedules, ignore_index=True)
-            final['date'] = final['date'].astype(str)
-            save_data(final, "Master_Schedule")
-            return {"message": f"Schedule generated for {len(all_schedules)} MRs!"}
-        
-        return {"message": "No schedule generated"}
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return {"job_id": job.id, "status": job.status, "seed": seed, "message": "Window regeneration started"}
+
+    started = time.time()
+    # The scoped upsert below deletes every row of the MR's window missing from the result, so a
+    # failed read must stop here rather than look like "nothing to schedule"
+    try:
+        users = fetch_data("User_Master", filters={"mr_id": mr_id})
+        if users.empty:
+            raise HTTPException(status_code=404, detail=f"MR '{mr_id}' not found")
+        zone = str(users['zone'].iloc[0])
+
+        # Only the MR's zone: its contacts and their activities
+        contacts = fetch_data("Contacts", filters={"Zone__ilike": zone})
+        contact_ids = contacts['Contact_id'].tolist() if 'Contact_id' in contacts.columns else []
+        activities = fetch_data("Activities", filters={"customer_id": contact_ids}) if contact_ids else pd.DataFrame()
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[RESCHEDULE] Loading data for {mr_id} failed: {e}")
+        raise HTTPException(status_code=503, detail=f"Could not load data for '{mr_id}': {e}")
+    if not contact_ids:
+        raise HTTPException(status_code=409, detail=f"No contacts in zone '{zone}'; schedule of '{mr_id}' left unchanged")
+
+    schedule = run_schedule_logic_for_single_mr(
+        mr_id, users, contacts, activities, current_date,
+        routing=backend, start_date=window_start, end_date=window_end, seed=seed
+    )
+    if not schedule.empty:
+        schedule['date'] = schedule['date'].astype(str)
+
+    scope = {"mr_id": mr_id, "date__gte": str(window_start.date()), "date__lte": str(window_end.date())}
+    try:
+        written = save_data(schedule, "Master_Schedule", mode="upsert", key="activity_id", scope=scope)
+    except BulkWriteError as e:
+        raise HTTPException(status_code=502, detail={"message": str(e), **e.summary})
+    run = log_schedule_run("reschedule", seed, scope['date__gte'], scope['date__lte'],
+                           written["rows_written"] if written else 0, mr_id=mr_id)
+
+    return {
+        "message": f"Rescheduled {mr_id} from {scope['date__gte']} to {scope['date__lte']}",
+        "mr_id": mr_id,
+        "seed": seed,
+        "run_id": run.get("id") if run else None,
+        "start_date": scope['date__gte'],
+        "end_date": scope['date__lte'],
+        "rows": len(schedule),
+        "upserted": written["upserted"] if written else 0,
+        "deleted": written["deleted"] if written else 0,
+        "elapsed_s": round(time.time() - started, 2),
+    }
+
+
+# --------------------------------------------------
+# Background jobs - progress / cancellation
+# --------------------------------------------------
+@router.get("/jobs")
+def list_jobs(kind: Optional[str] = None):
+    return [job.to_dict() for job in job_manager.list(kind)]
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """Request cancellation; the job stops at its next progress update (before publishing)."""
+    job = job_manager.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+# --------------------------------------------------
+# GET /admin/travel-cache - OSRM leg cache stats
+# --------------------------------------------------
+@router.get("/travel-cache")
+def get_travel_cache_stats():
+    return travel_cache.stats()
+
+
+# --------------------------------------------------
+# GET /admin/zone-cache - Scored zone contacts cache stats
+# --------------------------------------------------
+@router.get("/zone-cache")
+def get_zone_cache_stats():
+    return zone_cache.stats()
+
+
+# --------------------------------------------------
+# GET /admin/table-cache - Reference table (User_Master, Contacts) cache stats
+# --------------------------------------------------
+@router.get("/table-cache")
+def get_table_cache_stats():
+    return table_cache.stats()
+
+
+# --------------------------------------------------
+# Master_Schedule snapshots (publish / rollback / diff)
+# --------------------------------------------------
+@router.get("/snapshots")
+def get_schedule_snapshot():
+    try:
+        return get_snapshot_info("Master_Schedule") or {"message": "No snapshot published yet"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/snapshots/rollback")
+def rollback_schedule_snapshot():
+    try:
+        return rollback_snapshot("Master_Schedule")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/snapshots/diff")
+def diff_schedule_snapshots():
+    try:
+        return diff_snapshots("Master_Schedule")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
-        print(f"[GENERATE SCHEDULE ERROR] {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -106,17 +367,12 @@ def get_table_data(table_name: str, page: int = 1, page_size: int = 20):
     Returns { "data": [...], "total": N }
     """
     try:
-        df = load_data(table_name)
-        total = len(df)
-        
         # Pagination logic
         if page < 1:
             page = 1
-        start = (page - 1) * page_size
-        end = start + page_size
-        
-        # Safe slicing
-        paginated = df.iloc[start:end]
+
+        # Only the requested rows (plus an exact count) are read
+        paginated, total = load_page(table_name, page, page_size)
         
         # Fill NaNs to avoid JSON serialization errors
         paginated = paginated.fillna('') 
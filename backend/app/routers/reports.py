@@ -5,7 +5,7 @@ from typing import List, Dict, Any, Optional
 import pandas as pd
 from datetime import datetime, timedelta
 import calendar
-from app.services.supabase_db import supabase
+from app.services.supabase_db import supabase, resolve_table
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
@@ -14,7 +14,7 @@ router = APIRouter(prefix="/reports", tags=["Reports"])
 def debug_reports_health():
     """Check if reports router can access DB"""
     try:
-        res = supabase.table("master_schedule").select("count", count="exact").limit(1).execute()
+        res = supabase.table(resolve_table("master_schedule")).select("count", count="exact").limit(1).execute()
         return {"status": "ok", "total_rows": res.count, "timestamp": datetime.now().isoformat()}
     except Exception as e:
          return {"status": "error", "detail": str(e)}
@@ -26,7 +26,7 @@ def get_db_data(table="master_schedule", mr_id=None, start_date=None, end_date=N
     if not supabase:
         raise HTTPException(status_code=500, detail="Database connection failed")
 
-    query = supabase.table(table).select("*")
+    query = supabase.table(resolve_table(table)).select("*")
     
     # 1. MR Filter
     if mr_id and mr_id.lower() != 'admin':
@@ -0,0 +1,152 @@
+# app/services/jobs.py
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+# Long-running admin work (fleet schedule generation) runs on a background thread so the
+# HTTP request returns immediately; clients poll the job for progress and can cancel it.
+JOB_HISTORY = 20  # finished jobs kept for polling
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested."""
+
+
+class Job:
+    """State and progress of one background job. Updated by the worker, read by the API."""
+
+    def __init__(self, kind, params=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params or {}
+        self.status = "queued"  # queued | running | succeeded | failed | cancelled
+        self.stage = None
+        self.message = None
+        self.mrs_total = 0
+        self.mrs_done = 0
+        self.rows = 0
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def set_stage(self, stage, message=None):
+        self.check_cancelled()
+        self.stage = stage
+        self.message = message
+        print(f"[JOB {self.id}] {stage}{': ' + message if message else ''}")
+
+    def update(self, mrs_done, mrs_total, rows):
+        """Progress callback for the schedule engine; also the cancellation point."""
+        self.mrs_done, self.mrs_total, self.rows = mrs_done, mrs_total, rows
+        self.check_cancelled()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def eta_seconds(self):
+        if self.status != "running" or not self.started_at or not self.mrs_done or not self.mrs_total:
+            return None
+        elapsed = (datetime.now(timezone.utc) - self.started_at).total_seconds()
+        return round(elapsed / self.mrs_done * (self.mrs_total - self.mrs_done), 1)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "stage": self.stage,
+            "message": self.message,
+            "mrs_done": self.mrs_done,
+            "mrs_total": self.mrs_total,
+            "progress": round(self.mrs_done / self.mrs_total, 4) if self.mrs_total else 0.0,
+            "rows": self.rows,
+            "eta_seconds": self.eta_seconds(),
+            "cancel_requested": self._cancel.is_set(),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class JobManager:
+    """Runs jobs on daemon threads; at most one active job per kind."""
+
+    def __init__(self, history=JOB_HISTORY):
+        self.history = history
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, params=None):
+        """
+        Start fn(job) in the background and return the Job.
+        Raises RuntimeError if a job of the same kind is still active.
+        """
+        with self._lock:
+            running = next((j for j in self._jobs.values() if j.kind == kind and j.active), None)
+            if running:
+                raise RuntimeError(f"A {kind} job is already running ({running.id})")
+            job = Job(kind, params)
+            self._jobs[job.id] = job
+            self._prune()
+
+        thread = threading.Thread(target=self._run, args=(job, fn), name=f"job-{job.id}", daemon=True)
+        thread.start()
+        return job
+
+    def _run(self, job, fn):
+        job.status = "running"
+        job.started_at = datetime.now(timezone.utc)
+        try:
+            job.result = fn(job)
+            job.status = "succeeded"
+            job.stage = "done"
+            if isinstance(job.result, dict):
+                job.message = job.result.get("message", job.message)
+        except JobCancelled:
+            job.status = "cancelled"
+            job.message = "Cancelled"
+        except Exception as e:
+            traceback.print_exc()
+            job.status = "failed"
+            job.error = str(e)
+            job.result = getattr(e, "summary", None)  # e.g. BulkWriteError's written/failed counts
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            print(f"[JOB {job.id}] {job.kind} {job.status}")
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def list(self, kind=None):
+        return [job for job in reversed(self._jobs.values()) if kind is None or job.kind == kind]
+
+    def cancel(self, job_id):
+        job = self._jobs.get(job_id)
+        if job and job.active:
+            job.cancel()
+        return job
+
+
+# Shared manager used by the admin API
+job_manager = JobManager()
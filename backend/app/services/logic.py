@@ -29,6 +29,15 @@ from xgboost import XGBRegressor
 from sklearn.preprocessing import LabelEncoder
 import warnings
 from app.services.supabase_db import load_data, save_data  # <--- IMPORT THE NEW DATABASE FILE
+from app.services.travel_cache import travel_cache
+from app.services.model_registry import model_registry, MODEL_FEATURES
+import hashlib
+import secrets
+import zlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 warnings.filterwarnings('ignore')
 
@@ -39,7 +48,21 @@ import os
 if os.name == 'nt': 
     pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
-OSRM_BASE_URL = "http://router.project-osrm.org/route/v1/driving/"
+# Point OSRM_HOST at a self-hosted OSRM (or scripts/osrm_stub_server.py) to avoid the public demo server
+OSRM_HOST = os.getenv("OSRM_HOST", "http://router.project-osrm.org").rstrip("/")
+OSRM_BASE_URL = f"{OSRM_HOST}/route/v1/driving/"
+OSRM_TABLE_URL = f"{OSRM_HOST}/table/v1/driving/"
+OSRM_TABLE_TIMEOUT = 10
+
+# ─── ROUTING ───
+# Backend used when a run does not pick one: "osrm" (road network, needs network access)
+# or "haversine" (offline great-circle estimate scaled by a road factor).
+ROUTING_BACKEND = os.getenv("ROUTING_BACKEND", "osrm")
+ROAD_FACTOR = float(os.getenv("ROAD_FACTOR", "1.3"))      # road km per straight-line km in the city
+AVG_SPEED_KMH = float(os.getenv("AVG_SPEED_KMH", "25"))    # average city driving speed
+EARTH_RADIUS_KM = 6371.0088
+# Leg used when a point has no usable coordinates (the original fixed fallback)
+DEFAULT_LEG_KM, DEFAULT_LEG_MIN = 5.0, 15.0
 
 # ─── CONSTANTS ───
 SPECIALITIES = [
@@ -118,16 +141,180 @@ def extract_address(text):
     return m.group(1).strip().replace('\n', ' ') if m else ""
 
 # ─── LOGIC FUNCTIONS ───
+def haversine_matrix(lats, lons):
+    """Pairwise great-circle distances (km) between N points as an N x N array."""
+    lat = np.radians(np.asarray(lats, dtype=float))
+    lon = np.radians(np.asarray(lons, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def has_coordinates(*values):
+    """True when every value is a finite number (missing lat/lon arrive as None or NaN)."""
+    try:
+        return bool(np.all(np.isfinite(np.asarray(values, dtype=float))))
+    except (TypeError, ValueError):
+        return False
+
+
+def estimate_travel(lat1, lon1, lat2, lon2):
+    """Offline estimate for one leg: haversine x ROAD_FACTOR at AVG_SPEED_KMH (default leg without coordinates)."""
+    if not has_coordinates(lat1, lon1, lat2, lon2):
+        return DEFAULT_LEG_KM, DEFAULT_LEG_MIN
+    dist = haversine_matrix([lat1, lat2], [lon1, lon2])[0, 1] * ROAD_FACTOR
+    return round(float(dist), 2), round(float(dist) / AVG_SPEED_KMH * 60, 1)
+
+
 def get_travel_distance(lat1, lon1, lat2, lon2):
+    if not has_coordinates(lat1, lon1, lat2, lon2):
+        return DEFAULT_LEG_KM, DEFAULT_LEG_MIN
+
+    cached = travel_cache.get(lat1, lon1, lat2, lon2)
+    if cached is not None:
+        return cached
+
     url = f"{OSRM_BASE_URL}{lon1},{lat1};{lon2},{lat2}?overview=false"
     try:
         r = requests.get(url, timeout=3)
         data = r.json()
         if data.get('code') == 'Ok' and data.get('routes'):
             route = data['routes'][0]
-            return round(route['distance'] / 1000, 2), round(route['duration'] / 60, 1)
+            result = round(route['distance'] / 1000, 2), round(route['duration'] / 60, 1)
+            travel_cache.put(lat1, lon1, lat2, lon2, *result)
+            return result
     except: pass
-    return 5.0, 15.0
+    # OSRM unreachable: estimate from coordinates instead of a constant.
+    # Not cached so the leg is retried on the next run.
+    return estimate_travel(lat1, lon1, lat2, lon2)
+
+
+def get_travel_matrix(lats, lons):
+    """
+    Distance (km) / duration (min) matrices for N points from one OSRM /table request.
+    Served from the leg cache when every pair is cached; pairs OSRM cannot route
+    (or a failed request) fall back to the haversine estimate.
+    """
+    n = len(lats)
+    dist = np.zeros((n, n))
+    dur = np.zeros((n, n))
+    pairs = [(i, j) for i in range(n) for j in range(n) if i != j]
+    if not pairs:
+        return dist, dur
+
+    # Points without coordinates get the default leg; the rest are routed as usual
+    valid = [i for i in range(n) if has_coordinates(lats[i], lons[i])]
+    if len(valid) < n:
+        dist[:], dur[:] = DEFAULT_LEG_KM, DEFAULT_LEG_MIN
+        np.fill_diagonal(dist, 0.0)
+        np.fill_diagonal(dur, 0.0)
+        sub_dist, sub_dur = get_travel_matrix([lats[i] for i in valid], [lons[i] for i in valid])
+        dist[np.ix_(valid, valid)], dur[np.ix_(valid, valid)] = sub_dist, sub_dur
+        return dist, dur
+
+    cached = [travel_cache.get(lats[i], lons[i], lats[j], lons[j]) for i, j in pairs]
+    if all(c is not None for c in cached):
+        for (i, j), (d, m) in zip(pairs, cached):
+            dist[i, j], dur[i, j] = d, m
+        return dist, dur
+
+    coords = ";".join(f"{lon},{lat}" for lat, lon in zip(lats, lons))
+    url = f"{OSRM_TABLE_URL}{coords}?annotations=duration,distance"
+    distances = durations = None
+    try:
+        r = requests.get(url, timeout=OSRM_TABLE_TIMEOUT)
+        data = r.json()
+        if data.get('code') == 'Ok':
+            distances, durations = data.get('distances'), data.get('durations')
+    except Exception as e:
+        print(f"[ROUTING] OSRM table request failed: {e}")
+
+    fallback_dist, fallback_dur = HaversineBackend().matrix(lats, lons)
+    to_cache = []
+    for i, j in pairs:
+        d = distances[i][j] if distances else None
+        m = durations[i][j] if durations else None
+        if d is None or m is None:
+            dist[i, j], dur[i, j] = fallback_dist[i, j], fallback_dur[i, j]
+            continue
+        dist[i, j], dur[i, j] = round(d / 1000, 2), round(m / 60, 1)
+        to_cache.append(((lats[i], lons[i], lats[j], lons[j]), (dist[i, j], dur[i, j])))
+    travel_cache.put_many(to_cache)
+    return dist, dur
+
+
+class RoutingBackend:
+    """
+    Travel time/distance provider for the schedule engine.
+    Subclasses implement leg(); matrix() may be overridden with a bulk implementation.
+    """
+    name = None
+
+    def leg(self, lat1, lon1, lat2, lon2):
+        """Return (distance_km, duration_min) for one directed leg."""
+        raise NotImplementedError
+
+    def matrix(self, lats, lons):
+        """Return (distance_km, duration_min) N x N arrays for the given points."""
+        n = len(lats)
+        dist = np.zeros((n, n))
+        dur = np.zeros((n, n))
+        for i in range(n):
+            for j in range(n):
+                if i != j:
+                    dist[i, j], dur[i, j] = self.leg(lats[i], lons[i], lats[j], lons[j])
+        return dist, dur
+
+
+class OSRMBackend(RoutingBackend):
+    """OSRM road routing through the on-disk leg cache, with the haversine estimate as fallback."""
+    name = "osrm"
+
+    def leg(self, lat1, lon1, lat2, lon2):
+        return get_travel_distance(lat1, lon1, lat2, lon2)
+
+    def matrix(self, lats, lons):
+        return get_travel_matrix(lats, lons)
+
+
+class HaversineBackend(RoutingBackend):
+    """Fully offline, vectorized estimate: haversine distance x road factor at an average speed."""
+    name = "haversine"
+
+    def __init__(self, road_factor=None, speed_kmh=None):
+        self.road_factor = ROAD_FACTOR if road_factor is None else road_factor
+        self.speed_kmh = AVG_SPEED_KMH if speed_kmh is None else speed_kmh
+
+    def matrix(self, lats, lons):
+        dist = haversine_matrix(lats, lons) * self.road_factor
+        dur = dist / self.speed_kmh * 60
+        # Legs touching a point without coordinates come out NaN: use the default leg
+        missing = ~np.isfinite(dist)
+        dist[missing], dur[missing] = DEFAULT_LEG_KM, DEFAULT_LEG_MIN
+        np.fill_diagonal(dist, 0.0)
+        np.fill_diagonal(dur, 0.0)
+        return np.round(dist, 2), np.round(dur, 1)
+
+    def leg(self, lat1, lon1, lat2, lon2):
+        dist, dur = self.matrix([lat1, lat2], [lon1, lon2])
+        return float(dist[0, 1]), float(dur[0, 1])
+
+
+ROUTING_BACKENDS = {
+    OSRMBackend.name: OSRMBackend,
+    HaversineBackend.name: HaversineBackend,
+}
+
+
+def get_routing_backend(backend=None):
+    """Resolve a backend instance from a name (default ROUTING_BACKEND) or pass an instance through."""
+    if isinstance(backend, RoutingBackend):
+        return backend
+    name = (backend or ROUTING_BACKEND).lower()
+    if name not in ROUTING_BACKENDS:
+        raise ValueError(f"Unknown routing backend '{name}'. Choose one of: {', '.join(ROUTING_BACKENDS)}")
+    return ROUTING_BACKENDS[name]()
 
 def predict_status(ref):
     if ref == 0: return 'Unaware'
@@ -135,6 +322,34 @@ def predict_status(ref):
     elif 4 <= ref <= 10: return 'Engaged'
     else: return 'Champion'
 
+def predict_status_vectorized(referrals):
+    """Column version of predict_status: referral counts -> status labels (same buckets)."""
+    ref = np.asarray(referrals)
+    conditions = [ref == 0, (ref >= 1) & (ref <= 3), (ref >= 4) & (ref <= 10)]
+    return np.select(conditions, ['Unaware', 'Exploring', 'Engaged'], default='Champion')
+
+HIGH_VALUE_SEGMENTS = ['Peripheral Supporter', 'Silent Referrer']
+STATUS_RULE_POINTS = {'Unaware': 5, 'Exploring': 3, 'Engaged': 2}
+
+def rule_priority(row):
+    """Row-wise rule score (reference implementation; see rule_priority_scores)."""
+    score = 0
+    if row['current_status'] == 'Unaware': score += 5
+    elif row['current_status'] == 'Exploring': score += 3
+    elif row['current_status'] == 'Engaged': score += 2
+    if row['days_since_last_visit'] > 60: score += 4
+    if row['visit_count'] < 3: score += 3
+    if row['Segment'] in HIGH_VALUE_SEGMENTS: score += 2
+    return score
+
+def rule_priority_scores(contacts):
+    """Vectorized rule_priority over a contacts frame; returns an int Series aligned to contacts."""
+    score = contacts['current_status'].map(STATUS_RULE_POINTS).fillna(0).astype(int)
+    score += np.where(contacts['days_since_last_visit'] > 60, 4, 0)
+    score += np.where(contacts['visit_count'] < 3, 3, 0)
+    score += np.where(contacts['Segment'].isin(HIGH_VALUE_SEGMENTS), 2, 0)
+    return score
+
 # def run_schedule_logic_for_single_mr(selected_mr_id, users_df, contacts_df, activities_df, current_date_obj):
 #     # 1. Get MR Details
 #     mr_info = users_df[users_df['mr_id'] == selected_mr_id]
@@ -291,113 +506,380 @@ def predict_status(ref):
 #             current_lat, current_lon = cust.Latitude, cust.Longitude
 
 #     return pd.DataFrame(predicted_activities)
-def run_schedule_logic_for_single_mr(selected_mr_id, users_df, contacts_df, activities_df, current_date_obj):
-    print(f"[SCHEDULE] Starting for MR: {selected_mr_id}")
-    
-    # Force current_date_obj to Timestamp
-    current_date_obj = pd.Timestamp(current_date_obj)
-    
-    # 1. Get MR Details
-    mr_info = users_df[users_df['mr_id'] == selected_mr_id]
-    if mr_info.empty: 
-        print("[SCHEDULE] No MR info found")
-        return pd.DataFrame()
-    
-    mr_zone = str(mr_info['zone'].iloc[0]).upper()
-    
-    # 2. Filter Contacts by Zone
-    if 'Zone' not in contacts_df.columns: 
-        print("[SCHEDULE] No 'Zone' column")
-        return pd.DataFrame()
-    
-    contacts = contacts_df[contacts_df['Zone'].str.upper() == mr_zone].copy()
-    if contacts.empty: 
-        print("[SCHEDULE] No contacts in zone")
-        return pd.DataFrame()
+# ─── ROUTE OPTIMIZATION ───
+def route_cost(cost_matrix, order):
+    """Total cost of visiting `order` (node indices) in sequence; open path, no return leg."""
+    order = np.asarray(order)
+    return float(cost_matrix[order[:-1], order[1:]].sum()) if len(order) > 1 else 0.0
+
+
+def optimize_route(cost_matrix, start=0, max_passes=20):
+    """
+    Order all nodes of `cost_matrix` into a short open path beginning at `start`.
+    Nearest-neighbour construction followed by 2-opt segment reversals. Costs may be
+    asymmetric (OSRM durations), so candidate moves are scored on the full path cost.
+    """
+    cost_matrix = np.asarray(cost_matrix, dtype=float)
+    n = len(cost_matrix)
+    if n <= 2:
+        return list(range(n)) if start == 0 else [start] + [i for i in range(n) if i != start]
+
+    # 1. Nearest neighbour
+    order = [start]
+    remaining = set(range(n)) - {start}
+    while remaining:
+        last = order[-1]
+        nxt = min(remaining, key=lambda j: cost_matrix[last, j])
+        order.append(nxt)
+        remaining.remove(nxt)
+
+    # 2. 2-opt (the start node stays fixed)
+    best_cost = route_cost(cost_matrix, order)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 1):
+            for k in range(i + 1, n):
+                candidate = order[:i] + order[i:k + 1][::-1] + order[k + 1:]
+                cost = route_cost(cost_matrix, candidate)
+                if cost < best_cost - 1e-9:
+                    order, best_cost, improved = candidate, cost, True
+        if not improved:
+            break
+    return order
+
+
+# ─── SCHEDULE ENGINE ───
+# The engine is split into stages so a fleet run can share the expensive
+# work (date parsing, per-customer aggregates, zone scoring) across MRs:
+#   prepare_activities -> build_customer_features -> score_zone_contacts -> build_mr_schedule
+
+DAILY_STOPS = 8
+DAY_START = dt.time(10, 0)
+DAY_END = dt.time(19, 0)
+
+# Rolling horizon: existing rows are kept; only empty days are planned and cancelled
+# visits are backfilled. Backfilled rows carry FILL_ID_TAG in their activity_id so a
+# cancellation is only ever filled once.
+CANCELLED_STATUSES = {'Cancelled'}
+FILL_ID_TAG = "_FILL_"
+
+ACTIVITY_TYPES = ['Doctor Visit', 'Phone Call', 'Follow-up', 'Presentation']
+TYPE_PROBS = {
+    'Unaware': [0.4, 0.3, 0.2, 0.1], 'Exploring': [0.3, 0.3, 0.3, 0.1],
+    'Engaged': [0.2, 0.2, 0.3, 0.3], 'Champion': [0.1, 0.1, 0.2, 0.6]
+}
+DURATION_RANGES = {
+    'Unaware': range(30, 46, 5), 'Exploring': range(25, 41, 5),
+    'Engaged': range(20, 36, 5), 'Champion': range(15, 31, 5)
+}
+TALKING_POINTS = {
+    'Unaware': "Introduce hospital specialties & benefits",
+    'Exploring': "Share success stories & referral process",
+    'Engaged': "Discuss collaboration opportunities",
+    'Champion': "Thank for referrals & explore joint activities"
+}
+FEATURE_COLUMNS = ['referrals_count', 'visit_count', 'days_since_last_visit', 'visit_count_last_90']
+
+
+ZONE_CACHE_MAX_ENTRIES = int(os.getenv("ZONE_CACHE_MAX_ENTRIES", "64"))
+
+# Fleet runs build per-MR schedules on a process pool when SCHEDULE_WORKERS > 1.
+# "spawn" keeps workers independent of the server's threads; frames are sent once per worker.
+SCHEDULE_WORKERS = int(os.getenv("SCHEDULE_WORKERS", "1"))
+
+# Schedules are drawn from a seeded numpy Generator: same seed + same data = same schedule.
+# Unset means a fresh random seed per run (it is still recorded with the output).
+SCHEDULE_SEED = os.getenv("SCHEDULE_SEED")
+SCHEDULE_MP_START = os.getenv("SCHEDULE_MP_START", "spawn")
+TASKS_PER_WORKER = 4  # zone batches per worker, for load balancing across uneven zones
+
 
-    # CRITICAL FIX: Convert ALL date columns to datetime BEFORE any calculation
-    if 'date' in activities_df.columns:
-        print("[SCHEDULE] Converting activities 'date' to datetime")
-        activities_df['date'] = pd.to_datetime(activities_df['date'], errors='coerce')
-        invalid = activities_df['date'].isna().sum()
+class ZoneContactCache:
+    """
+    Scored, priority-sorted contacts per zone, keyed by (zone, scoring version), see scoring_version.
+    MRs sharing a zone reuse one scoring pass; entries are evicted least-recently-used.
+    Cached frames are shared and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=ZONE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, zone, version):
+        with self._lock:
+            scored = self._entries.get((zone, version))
+            if scored is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((zone, version))
+            self.hits += 1
+            return scored
+
+    def put(self, zone, version, scored):
+        with self._lock:
+            self._entries[(zone, version)] = scored
+            self._entries.move_to_end((zone, version))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "zones": sorted({zone for zone, _ in self._entries}),
+        }
+
+
+# Shared zone cache used by the schedule engine
+zone_cache = ZoneContactCache()
+
+
+def model_version(model):
+    """Version of the priority model a zone is scored with ("rules" when no model is loaded)."""
+    return model.snapshot if model is not None else "rules"
+
+
+def scoring_version(data_version, current_date_obj, model_ver):
+    """
+    Zone cache key component: scores depend on the zone's data, the priority model (a retrained
+    model rescores unchanged zones) and the scheduling date.
+    """
+    return f"{data_version}:{model_ver}:{pd.Timestamp(current_date_obj).date()}"
+
+
+def resolve_seed(seed=None):
+    """Seed for a schedule run: the given one, else SCHEDULE_SEED, else a fresh random one."""
+    if seed is not None:
+        return int(seed)
+    if SCHEDULE_SEED:
+        return int(SCHEDULE_SEED)
+    return secrets.randbits(32)
+
+
+def mr_rng(seed, mr_id):
+    """
+    Per-MR Generator derived from the run seed and the MR id, so an MR's schedule does not
+    depend on which other MRs are in the run or on which worker builds it.
+    """
+    return np.random.default_rng([int(seed), zlib.crc32(str(mr_id).encode())])
+
+
+def make_activity_id(mr_id, id_tag, day, customer_id):
+    """
+    Activity id derived from (MR, day, customer): regenerating a window gives a kept visit its old
+    id, so diff-aware upserts on activity_id only rewrite what actually changed. A customer is
+    visited at most once per MR-day, and backfills are told apart by their FILL_ID_TAG.
+    """
+    digest = hashlib.sha1(f"{mr_id}|{day}|{customer_id}".encode()).hexdigest()[:12]
+    return f"ACT_{mr_id}{id_tag}{digest}"
+
+
+def get_user_mr_id(user):
+    """Resolve the MR id from a User_Master row (flexible column name)."""
+    return user.get('mr_id') or user.get('MR_ID') or user.get('Mr_id')
+
+
+def prepare_activities(activities_df):
+    """Parse activity dates once and drop rows whose date cannot be parsed."""
+    if 'date' not in activities_df.columns:
+        return activities_df
+    activities = activities_df.copy()
+    activities['date'] = pd.to_datetime(activities['date'], errors='coerce')
+    invalid = activities['date'].isna().sum()
+    if invalid:
         print(f"[SCHEDULE] Dropped {invalid} invalid dates")
-        activities_df = activities_df.dropna(subset=['date'])
+    return activities.dropna(subset=['date'])
 
-    # 3. Merge Activity Data (Referrals, Visits)
-    latest_per_customer = activities_df.sort_values('date').groupby('customer_id').tail(1)[['customer_id', 'referrals_count', 'visit_count']]
-    contacts = contacts.merge(
-        latest_per_customer.rename(columns={'customer_id': 'cust_id_latest'}),
-        left_on='Contact_id', right_on='cust_id_latest', how='left'
-    ).drop(columns=['cust_id_latest'], errors='ignore')
 
-    contacts['referrals_count'] = contacts['referrals_count'].fillna(0).astype(int)
-    contacts['visit_count'] = contacts['visit_count'].fillna(0).astype(int)
-    contacts['current_status'] = contacts['referrals_count'].apply(predict_status)
+def build_customer_features(activities_df, current_date_obj):
+    """
+    Per-customer activity features for the whole fleet, indexed by customer_id.
+    Expects activities already passed through prepare_activities.
+    """
+    if activities_df.empty or 'customer_id' not in activities_df.columns:
+        return pd.DataFrame(columns=FEATURE_COLUMNS)
 
-    # 4. Calculate Days Since Last Visit - NOW SAFE
-    last_visit = activities_df.groupby('customer_id')['date'].max().reset_index()
-    last_visit['days_since_last_visit'] = (current_date_obj - last_visit['date']).dt.days
-    contacts = contacts.merge(
-        last_visit.rename(columns={'customer_id': 'cust_id_visit'}),
-        left_on='Contact_id', right_on='cust_id_visit', how='left'
-    ).drop(columns=['cust_id_visit'], errors='ignore')
-    contacts['days_since_last_visit'] = contacts['days_since_last_visit'].fillna(365)
+    current_date_obj = pd.Timestamp(current_date_obj)
+
+    # Latest referrals/visits per customer
+    latest = activities_df.sort_values('date').groupby('customer_id').tail(1)
+    features = latest.set_index('customer_id')[['referrals_count', 'visit_count']]
 
-    # 5. Calculate Recent Activity (Last 90 Days) - NOW SAFE
+    # Days since last visit
+    last_visit = activities_df.groupby('customer_id')['date'].max()
+    features['days_since_last_visit'] = (current_date_obj - last_visit).dt.days
+
+    # Recent activity (last 90 days)
     recent_visits = activities_df[activities_df['date'] > current_date_obj - timedelta(days=90)]
-    visit_count_90 = recent_visits.groupby('customer_id').size().reset_index(name='visit_count_last_90')
+    features['visit_count_last_90'] = recent_visits.groupby('customer_id').size()
+
+    return features
+
+
+def attach_customer_features(contacts, customer_features):
+    """Left-join fleet customer features onto a contacts slice and fill defaults."""
     contacts = contacts.merge(
-        visit_count_90.rename(columns={'customer_id': 'cust_id_90'}),
-        left_on='Contact_id', right_on='cust_id_90', how='left'
-    ).drop(columns=['cust_id_90'], errors='ignore')
+        customer_features[FEATURE_COLUMNS],
+        left_on='Contact_id', right_index=True, how='left'
+    ).reset_index(drop=True)
+
+    contacts['referrals_count'] = contacts['referrals_count'].fillna(0).astype(int)
+    contacts['visit_count'] = contacts['visit_count'].fillna(0).astype(int)
+    contacts['days_since_last_visit'] = contacts['days_since_last_visit'].fillna(365)
     contacts['visit_count_last_90'] = contacts['visit_count_last_90'].fillna(0)
+    return contacts
 
-    # 6. Rule-Based Scoring
-    def rule_priority(row):
-        score = 0
-        if row['current_status'] == 'Unaware': score += 5
-        elif row['current_status'] == 'Exploring': score += 3
-        elif row['current_status'] == 'Engaged': score += 2
-        if row['days_since_last_visit'] > 60: score += 4
-        if row['visit_count'] < 3: score += 3
-        if row['Segment'] in ['Peripheral Supporter', 'Silent Referrer']: score += 2
-        return score
-
-    contacts['rule_score'] = contacts.apply(rule_priority, axis=1)
-
-    # 7. XGBoost Scoring
-    le_segment = LabelEncoder()
-    le_status = LabelEncoder()
-    contacts['Segment_encoded'] = le_segment.fit_transform(contacts['Segment'])
-    contacts['Status_encoded'] = le_status.fit_transform(contacts['current_status'])
-
-    features = ['Segment_encoded', 'Status_encoded', 'referrals_count', 'visit_count', 'days_since_last_visit', 'visit_count_last_90', 'Latitude', 'Longitude']
-    X = contacts[features]
-    y = contacts['rule_score']
-
-    model = XGBRegressor()
-    model.fit(X, y)
-    contacts['xgb_score'] = model.predict(X)
-    
-    # 8. Final Prioritization (this was missing earlier - add it)
+
+def compute_data_version(*frames):
+    """Short content hash of the input frames; identifies a data snapshot for models and caches."""
+    digest = hashlib.sha1()
+    for df in frames:
+        try:
+            digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        except TypeError:
+            # Unhashable cell values (lists/dicts): fall back to the JSON rendering
+            digest.update(df.to_json(orient='values', date_format='iso').encode())
+        digest.update(','.join(map(str, df.columns)).encode())
+    return digest.hexdigest()[:16]
+
+
+def zone_data_version(zone_contacts, zone_activities):
+    """
+    Data version of one zone: its contacts plus the activities of those contacts.
+    No other rows affect a zone's scores, so a run that loaded only one zone (incremental
+    re-scheduling) and a fleet run scoring with the same model share zone_cache entries. Rows are ordered by id and numbers
+    hashed as float, so a filtered load hashes the same as the matching slice of a full load.
+    """
+    frames = []
+    for df in (zone_contacts, zone_activities):
+        if 'id' in df.columns:
+            df = df.sort_values('id', kind='stable')
+        numeric = df.select_dtypes('number').columns
+        frames.append(df.astype({col: 'float64' for col in numeric}))
+    return compute_data_version(*frames)
+
+
+def zone_activities(activities_df, zone_contacts):
+    """Activities of the given contacts."""
+    if 'customer_id' not in activities_df.columns:
+        return activities_df.iloc[0:0]
+    return activities_df[activities_df['customer_id'].isin(zone_contacts['Contact_id'])]
+
+
+def prepare_scoring_frame(contacts, customer_features):
+    """Attach activity features, engagement status and rule score to contacts."""
+    contacts = attach_customer_features(contacts, customer_features)
+    contacts['current_status'] = predict_status_vectorized(contacts['referrals_count'])
+
+    # Rule-Based Scoring
+    contacts['rule_score'] = rule_priority_scores(contacts)
+    return contacts
+
+
+def apply_priority_scores(contacts, model=None):
+    """
+    XGBoost + final priority over a prepared frame, sorted by priority.
+    With a registry `model` this is a single predict(); without one a model is fitted on
+    the given contacts (the original per-zone behaviour).
+    """
+    if model is not None:
+        contacts['xgb_score'] = model.predict(contacts)
+    else:
+        le_segment = LabelEncoder()
+        le_status = LabelEncoder()
+        contacts['Segment_encoded'] = le_segment.fit_transform(contacts['Segment'])
+        contacts['Status_encoded'] = le_status.fit_transform(contacts['current_status'])
+
+        X = contacts[MODEL_FEATURES]
+        y = contacts['rule_score']
+
+        xgb = XGBRegressor()
+        xgb.fit(X, y)
+        contacts['xgb_score'] = xgb.predict(X)
+
+    # Final Prioritization
     contacts['priority_score'] = 0.5 * contacts['rule_score'] + 0.5 * contacts['xgb_score']
-    contacts = contacts.sort_values('priority_score', ascending=False)
+    return contacts.sort_values('priority_score', ascending=False)
+
+
+def score_zone_contacts(contacts, customer_features, model=None):
+    """Attach features to a zone's contacts and compute rule, XGBoost and priority scores."""
+    return apply_priority_scores(prepare_scoring_frame(contacts, customer_features), model)
+
+
+def schedule_window(current_date_obj, start_date=None, end_date=None):
+    """Days to plan: the given range, defaulting to the 30 days after current_date_obj."""
+    current_date_obj = pd.Timestamp(current_date_obj)
+    start = pd.Timestamp(start_date) if start_date is not None else current_date_obj + timedelta(days=1)
+    end = pd.Timestamp(end_date) if end_date is not None else current_date_obj + timedelta(days=30)
+    return start.normalize(), end.normalize()
+
+
+def _existing_by_day(existing):
+    """Group an MR's existing Master_Schedule rows by calendar date."""
+    if existing is None or existing.empty or 'date' not in existing.columns:
+        return {}
+    dates = pd.to_datetime(existing['date'], errors='coerce').dt.date
+    return {day: rows for day, rows in existing.groupby(dates)}
+
+
+def _backfill_plan(day, kept, start_lat, start_lon):
+    """
+    Rolling-horizon plan for a day that already has rows: (stops, start time, start lat, start lon),
+    or None when the day is left as is. Stops replace cancellations not yet backfilled and
+    start after the day's last active visit, from its location.
+    """
+    cancelled = kept['status'].isin(CANCELLED_STATUSES)
+    filled = kept['activity_id'].astype(str).str.contains(FILL_ID_TAG, regex=False)
+    open_slots = int(cancelled.sum()) - int((filled & ~cancelled).sum())
+    if open_slots <= 0:
+        return None
+
+    day_start = dt.datetime.combine(day, DAY_START)
+    active = kept[~cancelled]
+    if active.empty:
+        return open_slots, day_start, start_lat, start_lon
+    ends = pd.to_datetime(active['end_time'].astype(str), format='%H:%M', errors='coerce')
+    if ends.isna().all():
+        return open_slots, day_start, start_lat, start_lon
+    last = active.loc[ends.idxmax()]
+    start_time = max(day_start, dt.datetime.combine(day, ends.max().time()))
+    lat, lon = pd.to_numeric(pd.Series([last.get('latitude'), last.get('longitude')]), errors='coerce')
+    if pd.isna(lat) or pd.isna(lon):
+        lat, lon = start_lat, start_lon
+    return open_slots, start_time, float(lat), float(lon)
+
+
+def build_mr_schedule(selected_mr_id, mr_info, contacts, current_date_obj, routing=None, start_date=None, end_date=None, existing=None, rng=None):
+    """
+    Run the daily loop for one MR over its zone's scored contacts (default: the next 30 days).
+    `existing` (the MR's current Master_Schedule rows) switches to rolling-horizon mode: days that
+    already have rows are left untouched except for backfilling cancelled visits, and only the
+    new rows are returned.
+    All randomness (daily sample, activity type, duration) comes from `rng`; activity ids are
+    derived from the MR, day and customer (make_activity_id).
+    """
+    current_date_obj = pd.Timestamp(current_date_obj)
+    routing = get_routing_backend(routing)
+    rng = rng if rng is not None else np.random.default_rng()
+    mr_zone = str(mr_info['zone'].iloc[0]).upper()
 
-    # 9. Schedule Generation Loop
     predicted_activities = []
-    activity_types = ['Doctor Visit', 'Phone Call', 'Follow-up', 'Presentation']
-    type_probs = {
-        'Unaware': [0.4, 0.3, 0.2, 0.1], 'Exploring': [0.3, 0.3, 0.3, 0.1],
-        'Engaged': [0.2, 0.2, 0.3, 0.3], 'Champion': [0.1, 0.1, 0.2, 0.6]
-    }
-    duration_ranges = {
-        'Unaware': range(30, 46, 5), 'Exploring': range(25, 41, 5),
-        'Engaged': range(20, 36, 5), 'Champion': range(15, 31, 5)
-    }
-
-    start_date = current_date_obj + timedelta(days=1)
-    end_date = current_date_obj + timedelta(days=30)
-    
+    start_date, end_date = schedule_window(current_date_obj, start_date, end_date)
+    existing_days = _existing_by_day(existing)
+
     # Get Start Location
     try:
         team = mr_info['team'].iloc[0]
@@ -410,36 +892,51 @@ def run_schedule_logic_for_single_mr(selected_mr_id, users_df, contacts_df, acti
     for day in pd.date_range(start=start_date, end=end_date):
         if day.weekday() >= 5: continue  # Skip Weekends
 
-        # Pick top 8 contacts for the day
-        daily_pool = contacts.sample(frac=0.3 if len(contacts)>10 else 1.0).sort_values('priority_score', ascending=False).head(8)
+        stops, current_time, origin_lat, origin_lon = DAILY_STOPS, dt.datetime.combine(day.date(), DAY_START), start_lat, start_lon
+        candidates, id_tag = contacts, "_"
+        kept = existing_days.get(day.date())
+        if kept is not None:
+            plan = _backfill_plan(day.date(), kept, start_lat, start_lon)
+            if plan is None: continue  # Day already planned and nothing to backfill
+            stops, current_time, origin_lat, origin_lon = plan
+            candidates, id_tag = contacts[~contacts['Contact_id'].isin(kept['customer_id'])], FILL_ID_TAG
+            if candidates.empty: continue
 
-        current_time = dt.datetime.combine(day.date(), dt.time(10, 0))
-        current_lat, current_lon = start_lat, start_lon
-        
-        for _, cust in daily_pool.iterrows():
-            dist, dur = get_travel_distance(current_lat, current_lon, cust.Latitude, cust.Longitude)
-            
-            probs = type_probs.get(cust.current_status, [0.25]*4)
-            act_type = np.random.choice(activity_types, p=probs)
-            duration_min = int(np.random.choice(duration_ranges.get(cust.current_status, range(20,36,5))))
+        # Pick top contacts for the day
+        daily_pool = candidates.sample(frac=0.3 if len(candidates)>10 else 1.0, random_state=rng).sort_values('priority_score', ascending=False).head(stops)
+
+        # One travel matrix per MR-day: index 0 is the start location, 1..N the day's stops
+        dist_matrix, dur_matrix = routing.matrix(
+            [origin_lat] + daily_pool['Latitude'].tolist(),
+            [origin_lon] + daily_pool['Longitude'].tolist()
+        )
+        current_idx = 0
+
+        # Visit the selected stops in travel-time order rather than priority order,
+        # so fewer visits are dropped by the 19:00 cutoff
+        route = optimize_route(dur_matrix, start=0)[1:]
+
+        for stop_idx in route:
+            cust = daily_pool.iloc[stop_idx - 1]
+            dist = float(dist_matrix[current_idx, stop_idx])
+            dur = float(dur_matrix[current_idx, stop_idx])
+
+            probs = TYPE_PROBS.get(cust.current_status, [0.25]*4)
+            act_type = rng.choice(ACTIVITY_TYPES, p=probs)
+            duration_min = int(rng.choice(DURATION_RANGES.get(cust.current_status, range(20,36,5))))
 
             estimated_end = current_time + timedelta(minutes=int(dur) + duration_min)
-            if estimated_end.time() > dt.time(19, 0): continue
+            if estimated_end.date() != day.date() or estimated_end.time() > DAY_END: continue
 
             current_time += timedelta(minutes=int(dur))
             start_str = current_time.strftime('%H:%M')
             end_time = current_time + timedelta(minutes=duration_min)
             end_str = end_time.strftime('%H:%M')
-            
-            talking_points = {
-                'Unaware': "Introduce hospital specialties & benefits",
-                'Exploring': "Share success stories & referral process",
-                'Engaged': "Discuss collaboration opportunities",
-                'Champion': "Thank for referrals & explore joint activities"
-            }.get(cust.current_status, "General follow-up")
+
+            talking_points = TALKING_POINTS.get(cust.current_status, "General follow-up")
 
             predicted_activities.append({
-                'activity_id': f"ACT_{selected_mr_id}_{uuid.uuid4().hex[:6]}",
+                'activity_id': make_activity_id(selected_mr_id, id_tag, day.date(), cust.Contact_id),
                 'mr_id': selected_mr_id,
                 'team': team,
                 'zone': mr_zone,
@@ -462,7 +959,243 @@ def run_schedule_logic_for_single_mr(selected_mr_id, users_df, contacts_df, acti
             })
 
             current_time = end_time
-            current_lat, current_lon = cust.Latitude, cust.Longitude
+            current_idx = stop_idx
+
+    return pd.DataFrame(predicted_activities)
+
+
+def run_schedule_logic_for_single_mr(selected_mr_id, users_df, contacts_df, activities_df, current_date_obj, customer_features=None, routing=None, start_date=None, end_date=None, existing=None, seed=None):
+    """
+    Generate a schedule for one MR (default: the next 30 days, or start_date..end_date).
+    contacts_df / activities_df may be the whole fleet or just the MR's zone (incremental re-scheduling).
+    Pass precomputed `customer_features` (see build_customer_features) to skip the activity aggregation,
+    and `routing` (backend name or RoutingBackend) to choose how travel legs are computed.
+    `existing` (the MR's Master_Schedule rows) selects rolling-horizon mode (see build_mr_schedule).
+    `seed` (see resolve_seed) makes the schedule reproducible; it is stored in schedule.attrs['seed'].
+    Scored zone contacts are reused from zone_cache when the zone's data version matches.
+    """
+    print(f"[SCHEDULE] Starting for MR: {selected_mr_id}")
+
+    # Force current_date_obj to Timestamp
+    current_date_obj = pd.Timestamp(current_date_obj)
+
+    # 1. Get MR Details
+    mr_info = users_df[users_df['mr_id'] == selected_mr_id]
+    if mr_info.empty: 
+        print("[SCHEDULE] No MR info found")
+        return pd.DataFrame()
+
+    mr_zone = str(mr_info['zone'].iloc[0]).upper()
+
+    # 2. Filter Contacts by Zone
+    if 'Zone' not in contacts_df.columns: 
+        print("[SCHEDULE] No 'Zone' column")
+        return pd.DataFrame()
+    contacts = contacts_df[contacts_df['Zone'].astype(str).str.upper() == mr_zone]
+    activities = zone_activities(activities_df, contacts)
+
+    # 3. Scored zone contacts (cached per zone + zone data, model and date)
+    model = model_registry.current
+    version = scoring_version(zone_data_version(contacts, activities), current_date_obj, model_version(model))
+    scored = zone_cache.get(mr_zone, version)
+
+    if scored is None:
+        if contacts.empty: 
+            print("[SCHEDULE] No contacts in zone")
+            return pd.DataFrame()
+
+        # Per-customer activity features (referrals, visits, recency)
+        if customer_features is None:
+            customer_features = build_customer_features(prepare_activities(activities), current_date_obj)
+
+        # Scoring (registry model when one is loaded)
+        scored = score_zone_contacts(contacts.copy(), customer_features, model=model)
+        zone_cache.put(mr_zone, version, scored)
+
+    if scored.empty:
+        print("[SCHEDULE] No contacts in zone")
+        return pd.DataFrame()
+
+    # 4. Daily loop
+    seed = resolve_seed(seed)
+    schedule = build_mr_schedule(selected_mr_id, mr_info, scored, current_date_obj, routing=routing,
+                                 start_date=start_date, end_date=end_date, existing=existing,
+                                 rng=mr_rng(seed, selected_mr_id))
+    schedule.attrs['seed'] = seed
+
+    print(f"[SCHEDULE] Generated {len(schedule)} activities for MR {selected_mr_id}")
+    return schedule
+
+
+def run_schedule_logic_for_fleet(users_df, contacts_df, activities_df, current_date_obj, routing=None, workers=None, progress=None, start_date=None, end_date=None, existing=None, seed=None):
+    """
+    Generate schedules for every MR in users_df.
+    Activity features are computed once for the fleet and each zone is scored once,
+    so cost grows with data size rather than MR count x data size.
+    With `workers` > 1 (default SCHEDULE_WORKERS) per-MR schedules are built on a process pool.
+    `progress(mrs_done, mrs_total, rows)` is called as MRs complete; an exception raised from it
+    (e.g. a job cancellation) stops the run.
+    `start_date` / `end_date` restrict planning to a date window (default: the next 30 days).
+    `existing` (current Master_Schedule rows) enables rolling-horizon mode, see build_mr_schedule;
+    the returned schedules then hold only the new rows.
+    `seed` (see resolve_seed) fixes every MR's random stream; the same seed and data give the same
+    schedules for any worker count. Each returned frame records it in attrs['seed'].
+    Returns a list of per-MR schedule DataFrames in users_df order (empty schedules are skipped).
+    """
+    current_date_obj = pd.Timestamp(current_date_obj)
+    routing = get_routing_backend(routing)
+    if users_df.empty or 'Zone' not in contacts_df.columns:
+        print("[SCHEDULE] Nothing to schedule (no users or no 'Zone' column)")
+        return []
+
+    data_version = compute_data_version(contacts_df, activities_df)
+
+    # Zone cache entries are versioned per zone (see zone_data_version); missing zones are scored
+    # with the model of this data snapshot (loaded or trained below by model_registry.get_model)
+    mr_zones = {str(user.get('zone')).upper() for _, user in users_df.iterrows() if get_user_mr_id(user)}
+    contacts_by_zone = dict(list(contacts_df.groupby(contacts_df['Zone'].astype(str).str.upper())))
+    versions, scored_zones = {}, {}
+    for zone in mr_zones:
+        contacts = contacts_by_zone.get(zone, contacts_df.iloc[0:0])
+        versions[zone] = scoring_version(
+            zone_data_version(contacts, zone_activities(activities_df, contacts)), current_date_obj, data_version
+        )
+        cached = zone_cache.get(zone, versions[zone])
+        if cached is not None:
+            scored_zones[zone] = cached
+
+    missing = sorted(mr_zones - set(scored_zones))
+    if missing:
+        customer_features = build_customer_features(prepare_activities(activities_df), current_date_obj)
+        print(f"[SCHEDULE] Built features for {len(customer_features)} customers")
+
+        # One model per data snapshot: loaded from disk, or trained once on the whole fleet
+        prepared = prepare_scoring_frame(contacts_df, customer_features)
+        model = model_registry.get_model(data_version, prepared)
+
+        zone_contacts = {zone: group for zone, group in prepared.groupby(prepared['Zone'].str.upper())}
+        for zone in missing:
+            contacts = zone_contacts.get(zone)
+            scored = apply_priority_scores(contacts.copy(), model) if contacts is not None else pd.DataFrame()
+            zone_cache.put(zone, versions[zone], scored)
+            scored_zones[zone] = scored
+
+    # Positions (not labels) of the users to schedule, grouped by zone
+    zone_positions = {}
+    for pos, (_, user) in enumerate(users_df.iterrows()):
+        zone = str(user.get('zone')).upper()
+        if get_user_mr_id(user) and not scored_zones[zone].empty:
+            zone_positions.setdefault(zone, []).append(pos)
+
+    workers = SCHEDULE_WORKERS if workers is None else workers
+    n_mrs = sum(len(p) for p in zone_positions.values())
+    window = schedule_window(current_date_obj, start_date, end_date)
+    seed = resolve_seed(seed)
+    existing_by_mr = None
+    if existing is not None:
+        existing_by_mr = dict(list(existing.groupby('mr_id'))) if not existing.empty else {}
+    tracker = _ProgressTracker(progress, n_mrs)
+    tracker.add([])
+    if workers > 1 and n_mrs > 1:
+        results = _build_schedules_parallel(zone_positions, users_df, scored_zones, current_date_obj, routing, workers, tracker, window, existing_by_mr, seed)
+    else:
+        _init_schedule_worker(users_df, scored_zones, current_date_obj, routing, window, existing_by_mr, seed)
+        results = []
+        for pos in [p for zone in sorted(zone_positions) for p in zone_positions[zone]]:
+            batch = _build_schedules_for_positions([pos])
+            results.extend(batch)
+            tracker.add(batch)
+
+    # Merge in users_df order regardless of which worker finished first
+    schedules = [sched for _, sched in sorted(results, key=lambda item: item[0]) if not sched.empty]
+    for sched in schedules:
+        sched.attrs['seed'] = seed
+
+    print(f"[SCHEDULE] Fleet run (seed {seed}): {len(schedules)} MRs, {len(missing)} zones scored, {len(scored_zones) - len(missing)} from cache")
+    return schedules
+
+
+class _ProgressTracker:
+    """Counts finished MRs / rows and forwards them to an optional progress callback."""
+
+    def __init__(self, callback, total):
+        self.callback = callback
+        self.total = total
+        self.done = 0
+        self.rows = 0
+
+    def add(self, results):
+        self.done += len(results)
+        self.rows += sum(len(sched) for _, sched in results)
+        if self.callback:
+            self.callback(self.done, self.total, self.rows)
+
+
+# Per-process state for schedule workers, set once by the pool initializer
+_worker_state = {}
+
+
+def _init_schedule_worker(users_df, scored_zones, current_date_obj, routing, window, existing_by_mr, seed):
+    _worker_state.update(users=users_df, zones=scored_zones, date=current_date_obj, routing=routing,
+                         window=window, existing=existing_by_mr or {}, seed=seed)
+
+
+def _build_schedules_for_positions(positions):
+    """Build schedules for users at the given positions of the worker's users frame."""
+    users_df = _worker_state['users']
+    results = []
+    for pos in positions:
+        mr_info = users_df.iloc[[pos]]
+        user = mr_info.iloc[0]
+        contacts = _worker_state['zones'][str(user.get('zone')).upper()]
+        mr_id = get_user_mr_id(user)
+        start_date, end_date = _worker_state['window']
+        sched = build_mr_schedule(mr_id, mr_info, contacts, _worker_state['date'],
+                                  routing=_worker_state['routing'], start_date=start_date, end_date=end_date,
+                                  existing=_worker_state['existing'].get(mr_id),
+                                  rng=mr_rng(_worker_state['seed'], mr_id))
+        results.append((pos, sched))
+    return results
+
+
+def _build_schedules_parallel(zone_positions, users_df, scored_zones, current_date_obj, routing, workers, tracker, window, existing_by_mr, seed):
+    """
+    Partition MRs by zone into batches and build them on a process pool.
+    Workers receive the users frame and only the zones they may need once, via the initializer.
+    """
+    n_mrs = sum(len(p) for p in zone_positions.values())
+    workers = min(workers, n_mrs)
+    batch_size = max(1, -(-n_mrs // (workers * TASKS_PER_WORKER)))
+
+    # Largest zones first; big zones are split so one zone can't serialize the run
+    batches = []
+    for zone in sorted(zone_positions, key=lambda z: (-len(zone_positions[z]), z)):
+        positions = zone_positions[zone]
+        batches.extend(positions[i:i + batch_size] for i in range(0, len(positions), batch_size))
+
+    zones = {zone: scored_zones[zone] for zone in zone_positions}
+    mr_ids = {get_user_mr_id(users_df.iloc[pos]) for positions in zone_positions.values() for pos in positions}
+    existing_by_mr = {mr: rows for mr, rows in (existing_by_mr or {}).items() if mr in mr_ids}
+    started = datetime.now()
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(SCHEDULE_MP_START),
+        initializer=_init_schedule_worker,
+        initargs=(users_df, zones, current_date_obj, routing, window, existing_by_mr, seed),
+    )
+    results = []
+    try:
+        futures = [pool.submit(_build_schedules_for_positions, batch) for batch in batches]
+        for future in as_completed(futures):
+            batch = future.result()
+            results.extend(batch)
+            tracker.add(batch)
+    except BaseException:
+        # Drop queued batches (cancellation or a failed batch) instead of finishing them
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
 
-    print(f"[SCHEDULE] Generated {len(predicted_activities)} activities for MR {selected_mr_id}")
-    return pd.DataFrame(predicted_activities)
\ No newline at end of file
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"[SCHEDULE] Built {n_mrs} MRs in {len(batches)} zone batches on {workers} workers ({elapsed:.2f}s)")
+    return results
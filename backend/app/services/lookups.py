@@ -0,0 +1,239 @@
+# app/services/lookups.py
+import os
+import threading
+import time
+import pandas as pd
+from app.services.supabase_db import load_data, fetch_data, table_cache, table_version, TABLE_CACHE_TTL
+
+# In-memory indexes over the cached reference tables, so hot endpoints do a dict lookup
+# instead of scanning a DataFrame. Indexes rebuild when the table's version changes (a write
+# through supabase_db) or when they are older than the table cache TTL.
+# An unknown id forces one reload from the database (at most every MISS_REFRESH_INTERVAL seconds),
+# so MRs added by another process can log in without waiting for the TTL.
+MISS_REFRESH_INTERVAL = float(os.getenv("LOOKUP_MISS_REFRESH", "30"))
+
+# Contacts grow by appends (synced contacts, scanned cards): new rows are picked up with an
+# `id > last seen id` query every CONTACT_INDEX_REFRESH seconds; edits and deletes made by other
+# processes are picked up by the full rebuild every CONTACT_INDEX_FULL_REFRESH seconds.
+CONTACT_INDEX_REFRESH = float(os.getenv("CONTACT_INDEX_REFRESH", "30"))
+CONTACT_INDEX_FULL_REFRESH = float(os.getenv("CONTACT_INDEX_FULL_REFRESH", "3600"))
+
+# Keyword scan for the Contacts enrichment columns (first matching column wins)
+CONTACT_FIELD_KEYWORDS = {
+    "phone": ['phone', 'mobile', 'contact', 'tel', 'cell', 'number'],
+    "segment": ['segment', 'category', 'type', 'group', 'class'],
+    "name": ['contact_name', 'name', 'customer_name'],
+}
+
+
+def normalize_id(value):
+    """Canonical form of an id for lookups (same as the old astype(str).str.strip() comparison)."""
+    return str(value).strip()
+
+
+def find_mr_id_column(columns):
+    """Flexible User_Master id column: first name containing mr_id / mrid / user_id, else None."""
+    for col in columns:
+        if 'mr_id' in col.lower() or 'mrid' in col.lower() or 'user_id' in col.lower():
+            return col
+    return None
+
+
+def find_contact_columns(columns):
+    """
+    {"phone", "segment", "name"} -> matching Contacts column (or None).
+    The key column is never a field: when 'contact' matches contact_id first, phone stays unset,
+    which is what the per-request merge produced (it fell back to 'N/A').
+    """
+    found = {}
+    for field, keywords in CONTACT_FIELD_KEYWORDS.items():
+        col = next((col for col in columns if any(kw in col.lower().strip() for kw in keywords)), None)
+        found[field] = col if col != 'contact_id' else None
+    return found
+
+
+def display_name(record, default):
+    """'name', else 'first_name last_name', else `default`."""
+    if 'name' in record:
+        name = record['name']
+    elif 'first_name' in record or 'last_name' in record:
+        first = record.get('first_name') or ''
+        last = record.get('last_name') or ''
+        name = f"{first} {last}".strip()
+    else:
+        name = default
+    if name is None or (isinstance(name, float) and pd.isna(name)):
+        name = ''
+    return str(name) or default
+
+
+class UserIndex:
+    """Normalized MR id -> {"mr_id", "name", "record"} over User_Master."""
+
+    def __init__(self, ttl=None):
+        self.ttl = TABLE_CACHE_TTL.get("users", 300) if ttl is None else ttl
+        self.mr_id_col = None
+        self.rows = 0  # User_Master rows at the last build (0: table empty or unreachable)
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self._users = {}
+        self._version = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def _stale(self):
+        return self._version != table_version("User_Master") or time.time() - self._built_at > self.ttl
+
+    def refresh(self, force=False):
+        """Rebuild from the cached table (force=True rereads the database first)."""
+        with self._lock:
+            if force:
+                table_cache.invalidate("users")
+            elif not self._stale():
+                return
+            version = table_version("User_Master")
+            df = load_data("User_Master")
+            mr_id_col = find_mr_id_column(df.columns)
+            users = {}
+            if mr_id_col:
+                for record in df.to_dict(orient='records'):
+                    mr_id = normalize_id(record[mr_id_col])
+                    users.setdefault(mr_id, {"mr_id": mr_id, "name": display_name(record, mr_id), "record": record})
+            self._users, self.mr_id_col, self.rows = users, mr_id_col, len(df)
+            self._version, self._built_at = version, time.time()
+            self.rebuilds += 1
+            print(f"[LOOKUP] User index built: {len(users)} MRs (User_Master v{version})")
+
+    def get(self, mr_id):
+        """User entry for an MR id, or None."""
+        if self._stale():
+            self.refresh()
+        key = normalize_id(mr_id)
+        user = self._users.get(key)
+        if user is None and time.time() - self._built_at > MISS_REFRESH_INTERVAL:
+            self.refresh(force=True)
+            user = self._users.get(key)
+        if user is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user
+
+    def __len__(self):
+        return len(self._users)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "users": len(self._users),
+            "mr_id_column": self.mr_id_col,
+            "version": self._version,
+            "age_s": round(time.time() - self._built_at, 1) if self._built_at else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "rebuilds": self.rebuilds,
+        }
+
+
+class ContactIndex:
+    """
+    contact_id -> {"phone", "segment", "name"} over Contacts, for enriching schedule rows.
+    Versioned like UserIndex; between full rebuilds only rows with a higher `id` are fetched.
+    A failed read keeps the previous index and is retried after MISS_REFRESH_INTERVAL seconds.
+    """
+
+    def __init__(self, refresh_interval=CONTACT_INDEX_REFRESH, full_refresh=CONTACT_INDEX_FULL_REFRESH):
+        self.refresh_interval = refresh_interval
+        self.full_refresh = full_refresh
+        self.columns = {}  # field -> Contacts column, see find_contact_columns
+        self.available = False  # Contacts has a contact_id column
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.increments = 0
+        self._contacts = {}
+        self._max_id = None
+        self._version = None
+        self._built_at = 0.0
+        self._checked_at = 0.0
+        self._failed_at = 0.0
+        self._lock = threading.Lock()
+
+    def _add(self, df):
+        for record in df.to_dict(orient='records'):
+            self._contacts[record['contact_id']] = {field: record.get(col) if col else None for field, col in self.columns.items()}
+        if 'id' in df.columns and not df.empty:
+            self._max_id = max(self._max_id or 0, int(df['id'].max()))
+
+    def _rebuild(self):
+        version = table_version("Contacts")
+        df = fetch_data("Contacts")  # raises: an unreachable table must not become an empty index
+        self.columns = find_contact_columns(df.columns)
+        self.available = 'contact_id' in df.columns
+        self._contacts, self._max_id = {}, None
+        if self.available:
+            self._add(df)
+        self._version, self._built_at, self._checked_at = version, time.time(), time.time()
+        self.rebuilds += 1
+        print(f"[LOOKUP] Contact index built: {len(self._contacts)} contacts (Contacts v{version})")
+
+    def _append_new(self):
+        self._checked_at = time.time()
+        if self._max_id is None:
+            return
+        wanted = list(dict.fromkeys(c for c in ['id', 'contact_id'] + list(self.columns.values()) if c))
+        new = fetch_data("Contacts", columns=wanted, filters={"id__gt": self._max_id})
+        if not new.empty:
+            self._add(new)
+            self.increments += 1
+            print(f"[LOOKUP] Contact index: +{len(new)} new contacts")
+
+    def refresh(self, force=False):
+        """Full rebuild when forced, written to or due; else fetch rows added since the last check."""
+        with self._lock:
+            now = time.time()
+            if not force and now - self._failed_at < MISS_REFRESH_INTERVAL:
+                return
+            try:
+                if force or self._version != table_version("Contacts") or now - self._built_at > self.full_refresh:
+                    self._rebuild()
+                elif now - self._checked_at > self.refresh_interval:
+                    self._append_new()
+            except Exception as e:
+                self._failed_at = time.time()
+                print(f"[LOOKUP] Contact index refresh failed, keeping {len(self._contacts)} contacts: {e}")
+
+    def lookup(self, contact_ids):
+        """{contact_id: {"phone", "segment", "name"}} for the ids that exist."""
+        self.refresh()
+        found = {}
+        for contact_id in contact_ids:
+            entry = self._contacts.get(contact_id)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                found[contact_id] = entry
+        return found
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "contacts": len(self._contacts),
+            "columns": self.columns,
+            "version": self._version,
+            "max_id": self._max_id,
+            "age_s": round(time.time() - self._built_at, 1) if self._built_at else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "rebuilds": self.rebuilds,
+            "increments": self.increments,
+        }
+
+
+# Shared indexes used by the API
+user_index = UserIndex()
+contact_index = ContactIndex()
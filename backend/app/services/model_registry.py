@@ -0,0 +1,161 @@
+# app/services/model_registry.py
+import os
+import json
+import threading
+from datetime import datetime, timezone
+from xgboost import XGBRegressor
+
+# Trained priority models live on disk so schedule generation only pays for predict().
+# One model per data snapshot (see logic.compute_data_version); latest.json points at the newest.
+MODEL_DIR = os.getenv(
+    "MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
+)
+MODEL_RETENTION = int(os.getenv("MODEL_RETENTION", "3"))
+
+MODEL_FEATURES = ['Segment_encoded', 'Status_encoded', 'referrals_count', 'visit_count', 'days_since_last_visit', 'visit_count_last_90', 'Latitude', 'Longitude']
+UNKNOWN_LABEL = -1  # encoding for segments/statuses not seen at training time
+
+
+class PriorityModel:
+    """XGBoost booster plus the label vocabularies it was trained with."""
+
+    def __init__(self, booster, segment_classes, status_classes, snapshot, trained_at=None, n_rows=0):
+        self.booster = booster
+        self.segment_classes = list(segment_classes)
+        self.status_classes = list(status_classes)
+        self.snapshot = snapshot
+        self.trained_at = trained_at or datetime.now(timezone.utc).isoformat()
+        self.n_rows = n_rows
+
+    @staticmethod
+    def _encode(values, classes):
+        lookup = {label: i for i, label in enumerate(classes)}
+        return values.map(lookup).fillna(UNKNOWN_LABEL).astype(int)
+
+    def encode(self, contacts):
+        """Add Segment_encoded / Status_encoded using the stored vocabularies."""
+        contacts['Segment_encoded'] = self._encode(contacts['Segment'], self.segment_classes)
+        contacts['Status_encoded'] = self._encode(contacts['current_status'], self.status_classes)
+        return contacts
+
+    def predict(self, contacts):
+        return self.booster.predict(self.encode(contacts)[MODEL_FEATURES])
+
+    @classmethod
+    def train(cls, frame, snapshot):
+        """Fit on a scored frame (needs Segment, current_status, rule_score and the raw features)."""
+        segment_classes = sorted(frame['Segment'].dropna().astype(str).unique())
+        status_classes = sorted(frame['current_status'].dropna().astype(str).unique())
+        model = cls(XGBRegressor(), segment_classes, status_classes, snapshot, n_rows=len(frame))
+        X = model.encode(frame.copy())[MODEL_FEATURES]
+        model.booster.fit(X, frame['rule_score'])
+        return model
+
+    def meta(self):
+        return {
+            "snapshot": self.snapshot,
+            "trained_at": self.trained_at,
+            "n_rows": self.n_rows,
+            "features": MODEL_FEATURES,
+            "segment_classes": self.segment_classes,
+            "status_classes": self.status_classes,
+        }
+
+
+class ModelRegistry:
+    """Loads, trains and persists PriorityModels keyed by data snapshot."""
+
+    def __init__(self, model_dir=MODEL_DIR):
+        self.model_dir = model_dir
+        self.current = None
+        self._lock = threading.Lock()
+
+    def _paths(self, snapshot):
+        base = os.path.join(self.model_dir, f"priority_model_{snapshot}")
+        return f"{base}.json", f"{base}.meta.json"
+
+    def _load(self, snapshot):
+        booster_path, meta_path = self._paths(snapshot)
+        if not (os.path.exists(booster_path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            booster = XGBRegressor()
+            booster.load_model(booster_path)
+            return PriorityModel(
+                booster, meta["segment_classes"], meta["status_classes"],
+                meta["snapshot"], meta.get("trained_at"), meta.get("n_rows", 0)
+            )
+        except Exception as e:
+            print(f"[MODEL] Failed to load model {snapshot}: {e}")
+            return None
+
+    def load_latest(self):
+        """Load the model latest.json points at (called at startup). Returns it or None."""
+        pointer = os.path.join(self.model_dir, "latest.json")
+        if not os.path.exists(pointer):
+            print("[MODEL] No saved priority model yet")
+            return None
+        try:
+            with open(pointer) as f:
+                snapshot = json.load(f).get("snapshot")
+        except (OSError, ValueError) as e:
+            # Truncated or unreadable pointer (e.g. crash mid-save): start without a model
+            print(f"[MODEL] Could not read {pointer}: {e}")
+            return None
+        model = self._load(snapshot)
+        if model:
+            self.current = model
+            print(f"[MODEL] Loaded priority model {snapshot} ({model.n_rows} training rows)")
+        return model
+
+    def save(self, model):
+        os.makedirs(self.model_dir, exist_ok=True)
+        booster_path, meta_path = self._paths(model.snapshot)
+        model.booster.save_model(booster_path)
+        with open(meta_path, "w") as f:
+            json.dump(model.meta(), f, indent=2)
+        with open(os.path.join(self.model_dir, "latest.json"), "w") as f:
+            json.dump({"snapshot": model.snapshot, "trained_at": model.trained_at}, f)
+        self._prune()
+
+    def _prune(self):
+        metas = sorted(
+            (p for p in os.listdir(self.model_dir) if p.endswith(".meta.json")),
+            key=lambda p: os.path.getmtime(os.path.join(self.model_dir, p)),
+            reverse=True
+        )
+        for meta_name in metas[MODEL_RETENTION:]:
+            base = meta_name[:-len(".meta.json")]
+            for path in (f"{base}.json", meta_name):
+                try:
+                    os.remove(os.path.join(self.model_dir, path))
+                except OSError:
+                    pass
+
+    def get_model(self, snapshot, training_frame=None):
+        """
+        Model for `snapshot`: in memory, else on disk, else trained on `training_frame` and saved.
+        Returns None when nothing matches and no training frame is given.
+        """
+        with self._lock:
+            if self.current is not None and self.current.snapshot == snapshot:
+                return self.current
+            model = self._load(snapshot)
+            if model is None:
+                if training_frame is None or training_frame.empty:
+                    return None
+                print(f"[MODEL] Training priority model for snapshot {snapshot} on {len(training_frame)} contacts")
+                model = PriorityModel.train(training_frame, snapshot)
+                try:
+                    self.save(model)
+                except OSError as e:
+                    print(f"[MODEL] Could not persist model: {e}")
+            self.current = model
+            return model
+
+
+# Shared registry used by the schedule engine
+model_registry = ModelRegistry()
@@ -1,6 +1,14 @@
-
 import os
+import re
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import pandas as pd
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
@@ -22,82 +30,938 @@ TABLE_MAP = {
     "Master_Schedule": "master_schedule"
 }
 
-def load_data(sheet_name: str) -> pd.DataFrame:
-    """Load data from Supabase table into DataFrame"""
+# ─── SNAPSHOT TABLES ───
+# Snapshot-managed tables are double-buffered: two physical tables per logical name and a
+# one-row pointer in `table_pointers` saying which one readers should use. Publication fills
+# the inactive table and then flips the pointer in a single UPDATE, so readers always see a
+# complete snapshot and the previous one stays available for rollback and diffing.
+SNAPSHOT_TABLES = {
+    "master_schedule": ("master_schedule", "master_schedule_b"),
+}
+POINTER_TABLE = "table_pointers"
+POINTER_CACHE_TTL = float(os.getenv("SNAPSHOT_POINTER_TTL", "5"))
+_pointer_cache: Dict[str, Any] = {}
+
+def _read_pointer(logical_name: str) -> Optional[Dict[str, Any]]:
+    """Pointer row for a snapshot table; raises if the pointer table is unavailable."""
+    data = supabase.table(POINTER_TABLE).select("*").eq("logical_name", logical_name).execute().data
+    return data[0] if data else None
+
+def resolve_table(table_name: str) -> str:
+    """Physical table readers/writers should use for `table_name` (identity for normal tables)."""
+    if table_name not in SNAPSHOT_TABLES or not supabase:
+        return table_name
+
+    cached = _pointer_cache.get(table_name)
+    if cached and cached[1] > time.time():
+        return cached[0]
+
+    physical = table_name
+    try:
+        pointer = _read_pointer(table_name)
+        if pointer and pointer.get("physical_name") in SNAPSHOT_TABLES[table_name]:
+            physical = pointer["physical_name"]
+    except Exception as e:
+        # Pointer table not created yet: behave like a single plain table
+        print(f"[SNAPSHOT] Pointer lookup failed for '{table_name}', using it directly: {e}")
+    _pointer_cache[table_name] = (physical, time.time() + POINTER_CACHE_TTL)
+    return physical
+
+def get_table_name(sheet_name: str) -> str:
+    """Sheet name -> physical Supabase table (snapshot-aware)."""
+    return resolve_table(TABLE_MAP.get(sheet_name, sheet_name.lower()))
+
+# PostgREST caps every response at `max-rows` (1000 on Supabase by default),
+# so reads are range-paginated in pages no larger than this.
+MAX_ROWS_PER_REQUEST = int(os.getenv("SUPABASE_MAX_ROWS", "1000"))
+
+# Filters are pushed down to PostgREST: {"col": value} is equality, a list/tuple/set is `in`,
+# and "col__op" picks an operator explicitly, e.g. {"date__gte": "2026-01-01", "mr_id__in": [...]}.
+FILTER_OPS = {
+    "eq": "eq", "neq": "neq", "gt": "gt", "gte": "gte",
+    "lt": "lt", "lte": "lte", "in": "in_", "ilike": "ilike",
+}
+# Long `in` lists are split across requests to keep the query string a sane length
+IN_FILTER_CHUNK = 200
+
+def apply_filters(query, filters: Optional[Dict[str, Any]]):
+    """Apply load_data-style filters to a supabase query builder."""
+    for key, value in (filters or {}).items():
+        column, _, op = key.partition("__")
+        if not op:
+            op = "in" if isinstance(value, (list, tuple, set)) else "eq"
+        if op not in FILTER_OPS:
+            raise ValueError(f"Unsupported filter operator '{op}' in '{key}'")
+        if op == "in":
+            value = list(value)
+        query = getattr(query, FILTER_OPS[op])(column, value)
+    return query
+
+def _split_in_filter(filters: Optional[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """Split the largest `in` filter into IN_FILTER_CHUNK-sized pieces (one filter dict per request)."""
+    in_keys = [k for k, v in (filters or {}).items()
+               if (k.endswith("__in") or "__" not in k) and isinstance(v, (list, tuple, set))]
+    if not in_keys:
+        return [filters]
+    key = max(in_keys, key=lambda k: len(filters[k]))
+    values = list(dict.fromkeys(filters[key]))
+    if len(values) <= IN_FILTER_CHUNK:
+        return [filters]
+    return [dict(filters, **{key: values[i:i + IN_FILTER_CHUNK]}) for i in range(0, len(values), IN_FILTER_CHUNK)]
+
+def iter_data(sheet_name: str, columns: Optional[List[str]] = None,
+              chunk_size: int = MAX_ROWS_PER_REQUEST, order_by: Optional[str] = "id",
+              filters: Optional[Dict[str, Any]] = None, resolve: bool = True) -> Iterator[pd.DataFrame]:
+    """
+    Yield a table as DataFrame chunks using range pagination.
+    `columns` projects the select, `filters` are applied server-side (see apply_filters),
+    and `order_by` keeps page boundaries stable between requests.
+    resolve=False reads `sheet_name` as a physical table name (bypasses the snapshot pointer).
+    """
+    if not supabase:
+        print("Supabase not configured.")
+        return
+
+    table_name = get_table_name(sheet_name) if resolve else sheet_name
+    select = ",".join(columns) if columns else "*"
+    chunk_size = max(1, min(chunk_size, MAX_ROWS_PER_REQUEST))
+
+    for request_filters in _split_in_filter(filters):
+        start = 0
+        while True:
+            query = apply_filters(supabase.table(table_name).select(select), request_filters)
+            if order_by:
+                query = query.order(order_by)
+            data = query.range(start, start + chunk_size - 1).execute().data
+            if not data:
+                break
+            yield pd.DataFrame(data)
+            if len(data) < chunk_size:
+                break
+            start += chunk_size
+
+def load_page(sheet_name: str, page: int = 1, page_size: int = 20,
+              order_by: Optional[str] = "id") -> Tuple[pd.DataFrame, int]:
+    """
+    One page of a table and the table's row count, in a single request: (DataFrame, total).
+    For paged views, which must not download the whole table. Errors propagate.
+    """
+    if not supabase:
+        raise RuntimeError("Supabase not configured")
+    page_size = max(1, min(page_size, MAX_ROWS_PER_REQUEST))
+    start = (max(page, 1) - 1) * page_size
+    query = supabase.table(get_table_name(sheet_name)).select("*", count="exact")
+    if order_by:
+        query = query.order(order_by)
+    response = query.range(start, start + page_size - 1).execute()
+    return pd.DataFrame(response.data or []), response.count or 0
+
+def load_data(sheet_name: str, columns: Optional[List[str]] = None,
+              chunk_size: int = MAX_ROWS_PER_REQUEST,
+              filters: Optional[Dict[str, Any]] = None, cache: bool = True) -> pd.DataFrame:
+    """
+    Load a Supabase table (all pages, optionally projected/filtered server-side) into a DataFrame.
+    Reference tables in TABLE_CACHE_TTL are served from table_cache (whole table, projected and
+    filtered in memory); cache=False always reads from the database.
+    """
     if not supabase:
         print("Supabase not configured.")
         return pd.DataFrame()
         
-    table_name = TABLE_MAP.get(sheet_name, sheet_name.lower())
+    table_name = get_table_name(sheet_name)
+    logical = TABLE_MAP.get(sheet_name, sheet_name.lower())
     
     try:
-        # Fetch all data (Supabase limits to 1000 by default, need to paginate for large sets)
-        # For now, simplistic fetch
-        response = supabase.table(table_name).select("*").execute()
-        data = response.data
-        
-        if not data:
+        if cache and table_cache.ttl(logical):
+            table = table_cache.get_or_load(logical, lambda: fetch_data(sheet_name))
+            return _select_local(table, columns, filters)
+
+        chunks = list(iter_data(sheet_name, columns=columns, chunk_size=chunk_size, filters=filters))
+        if not chunks:
             return pd.DataFrame()
             
-        df = pd.DataFrame(data)
-        return df
+        return pd.concat(chunks, ignore_index=True)
         
     except Exception as e:
         print(f"Error loading table '{table_name}': {e}")
         return pd.DataFrame()
 
-def save_data(df: pd.DataFrame, sheet_name: str):
+def fetch_data(sheet_name: str, columns: Optional[List[str]] = None,
+               filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
     """
-    Save DataFrame to Supabase table. 
-    WARNING: This mimics the GSheets 'Overwrite' behavior by deleting all rows first.
+    Uncached load_data whose errors propagate instead of returning an empty frame.
+    For reads whose result gets written back (an empty frame there means "no rows", not "failed").
+    """
+    if not supabase:
+        raise RuntimeError("Supabase not configured")
+    chunks = list(iter_data(sheet_name, columns=columns, filters=filters))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+# ─── REFERENCE TABLE CACHE ───
+# Small, rarely written tables are read on almost every request (login, MR dropdown, daily
+# schedule enrichment). They are cached whole per process and expire after a per-table TTL;
+# writes through this module invalidate them immediately. Other processes (extra uvicorn
+# workers, scripts) only see a write once their copy expires, so the TTL bounds staleness.
+TABLE_CACHE_TTL = {
+    "users": float(os.getenv("USERS_CACHE_TTL", "300")),
+    "contacts": float(os.getenv("CONTACTS_CACHE_TTL", "300")),
+}
+TABLE_CACHE_MAX_BYTES = int(float(os.getenv("TABLE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+class TableCache:
+    """
+    Whole-table DataFrames keyed by logical table name, with TTL expiry and least-recently-used
+    eviction once the cached frames exceed `max_bytes`. Each table has a version counter that
+    changes on every invalidation, so derived indexes can tell when to rebuild.
+    Cached frames are shared and must be treated as read-only.
+    """
+
+    def __init__(self, ttls=None, max_bytes=TABLE_CACHE_MAX_BYTES):
+        self.ttls = dict(TABLE_CACHE_TTL if ttls is None else ttls)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # table -> (frame, expires_at, nbytes, loaded_at)
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def ttl(self, table: str) -> float:
+        return self.ttls.get(table, 0)
+
+    def version(self, table: str) -> int:
+        return self._versions.get(table, 0)
+
+    def get(self, table: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(table)
+            if entry is not None and entry[1] <= time.time():
+                del self._entries[table]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(table)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, table: str, frame: pd.DataFrame, version: Optional[int] = None) -> bool:
+        """Store a freshly loaded frame; skipped if the table was invalidated since `version` was read."""
+        nbytes = int(frame.memory_usage(deep=True).sum())
+        with self._lock:
+            if version is not None and version != self.version(table):
+                return False
+            if nbytes > self.max_bytes:
+                print(f"[TABLE CACHE] '{table}' ({nbytes / 1e6:.1f} MB) exceeds the cache bound, not cached")
+                return False
+            self._entries[table] = (frame, time.time() + self.ttl(table), nbytes, time.time())
+            self._entries.move_to_end(table)
+            while sum(e[2] for e in self._entries.values()) > self.max_bytes:
+                evicted, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                print(f"[TABLE CACHE] Evicted '{evicted}'")
+            return True
+
+    def get_or_load(self, table: str, loader) -> pd.DataFrame:
+        """Cached frame, else loader() (concurrent misses on one table share a single load)."""
+        frame = self.get(table)
+        if frame is not None:
+            return frame
+        with self._lock:
+            load_lock = self._load_locks.setdefault(table, threading.Lock())
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(table)
+                if entry is not None and entry[1] > time.time():
+                    return entry[0]
+            version = self.version(table)
+            started = time.time()
+            frame = loader()
+            self.put(table, frame, version)
+            print(f"[TABLE CACHE] Loaded '{table}' ({len(frame)} rows, {time.time() - started:.2f}s)")
+            return frame
+
+    def invalidate(self, table: str):
+        """Drop a table after a write and bump its version (a no-op for uncached tables)."""
+        if table not in self.ttls:
+            return
+        with self._lock:
+            self._versions[table] = self.version(table) + 1
+            if self._entries.pop(table, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            for table in self._entries:
+                self._versions[table] = self.version(table) + 1
+            self._entries.clear()
+            self.hits = self.misses = self.expirations = self.evictions = self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            tables = {
+                table: {
+                    "ttl_s": self.ttl(table),
+                    "version": self.version(table),
+                    "cached": table in self._entries,
+                    "rows": len(self._entries[table][0]) if table in self._entries else None,
+                    "bytes": self._entries[table][2] if table in self._entries else 0,
+                    "age_s": round(now - self._entries[table][3], 1) if table in self._entries else None,
+                }
+                for table in self.ttls
+            }
+        lookups = self.hits + self.misses
+        return {
+            "bytes": sum(t["bytes"] for t in tables.values()),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "tables": tables,
+        }
+
+# Shared cache used by load_data
+table_cache = TableCache()
+
+def table_version(sheet_name: str) -> int:
+    """Version counter of a cached table; changes whenever the table is written through this module."""
+    return table_cache.version(TABLE_MAP.get(sheet_name, sheet_name.lower()))
+
+def _logical_table(table_name: str) -> str:
+    """Physical table -> logical name (snapshot slots map back to their logical table)."""
+    for logical, slots in SNAPSHOT_TABLES.items():
+        if table_name in slots:
+            return logical
+    return table_name
+
+def _ilike_regex(pattern: str) -> str:
+    return "".join(".*" if ch == "%" else "." if ch == "_" else re.escape(ch) for ch in str(pattern))
+
+def _local_mask(series: pd.Series, op: str, value) -> pd.Series:
+    """
+    In-memory equivalent of one PostgREST filter. Values are cast to the column's type like Postgres
+    casts query params (eq.1 matches 1.0 in a numeric column; a non-number raises ValueError).
+    """
+    present = series.notna()
+    if op in ("eq", "neq", "in"):
+        values = list(value) if op == "in" else [value]
+        if pd.api.types.is_bool_dtype(series):
+            match = series.astype(str).str.lower().isin({str(v).lower() for v in values})
+        elif pd.api.types.is_numeric_dtype(series):
+            match = series.isin([float(v) for v in values])
+        else:
+            match = series.astype(str).isin({str(v) for v in values})
+        return present & (~match if op == "neq" else match)
+    if op == "ilike":
+        return present & series.astype(str).str.fullmatch(_ilike_regex(value), case=False)
+    if pd.api.types.is_numeric_dtype(series):
+        value = float(value)
+    else:
+        series = series.astype(str)
+        value = str(value)
+    compare = {"gt": series.gt, "gte": series.ge, "lt": series.lt, "lte": series.le}[op]
+    return present & compare(value)
+
+def _select_local(table: pd.DataFrame, columns: Optional[List[str]] = None,
+                  filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """Project and filter a cached table like iter_data would server-side. Returns a new frame."""
+    if table.empty:
+        return pd.DataFrame()
+    missing = [c for c in list(columns or []) + [k.partition("__")[0] for k in filters or {}] if c not in table.columns]
+    if missing:
+        raise KeyError(f"column(s) {missing} do not exist")
+    mask = pd.Series(True, index=table.index)
+    for key, value in (filters or {}).items():
+        column, _, op = key.partition("__")
+        if not op:
+            op = "in" if isinstance(value, (list, tuple, set)) else "eq"
+        if op not in FILTER_OPS:
+            raise ValueError(f"Unsupported filter operator '{op}' in '{key}'")
+        mask &= _local_mask(table[column], op, value)
+    selected = table.loc[mask, list(columns)] if columns else table.loc[mask]
+    if selected.empty:
+        return pd.DataFrame()
+    return selected.reset_index(drop=True).copy()
+
+_COLUMN_CACHE: Dict[str, List[str]] = {}
+
+def table_columns(sheet_name: str, refresh: bool = False) -> List[str]:
+    """
+    Column names of a table, from a one-row probe (cached per process).
+    Lets callers pick columns for projection before loading; [] if the table is empty or unreachable.
+    """
+    table_name = TABLE_MAP.get(sheet_name, sheet_name.lower())
+    if not refresh and table_name in _COLUMN_CACHE:
+        return _COLUMN_CACHE[table_name]
+    if not supabase:
+        return []
+
+    try:
+        data = supabase.table(resolve_table(table_name)).select("*").limit(1).execute().data
+    except Exception as e:
+        print(f"Error reading columns of '{table_name}': {e}")
+        return []
+    if not data:
+        return []
+    _COLUMN_CACHE[table_name] = list(data[0].keys())
+    return _COLUMN_CACHE[table_name]
+
+def _to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert DataFrame to JSON-safe records"""
+    # Handle NaN values which JSON doesn't like
+    df_clean = df.where(pd.notnull(df), None)
+    # Convert Timestamp/Date to strings
+    for col in df_clean.columns:
+        if pd.api.types.is_datetime64_any_dtype(df_clean[col]):
+            df_clean[col] = df_clean[col].astype(str)
+    
+    return df_clean.to_dict(orient='records')
+
+def _normalize_value(value):
+    """Comparable form of a cell, so DB round-trips (5 vs 5.0, NaN vs None) don't count as changes."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value != value:  # NaN
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # to_json writes 15 decimals but may be off in the last one for full-precision doubles
+        return round(float(value), 12)
+    return str(value)
+
+def _row_key(record: Dict[str, Any], keys: List[str]):
+    return tuple(_normalize_value(record.get(k)) for k in keys)
+
+# ─── BULK WRITES ───
+# Chunks are sent concurrently over a bounded thread pool; each chunk is retried with
+# exponential backoff and failures are reported in the summary instead of being swallowed.
+WRITE_CHUNK_SIZE = int(os.getenv("SUPABASE_WRITE_CHUNK", "1000"))
+WRITE_WORKERS = int(os.getenv("SUPABASE_WRITE_WORKERS", "4"))
+WRITE_RETRIES = int(os.getenv("SUPABASE_WRITE_RETRIES", "3"))
+WRITE_BACKOFF = float(os.getenv("SUPABASE_WRITE_BACKOFF", "0.5"))
+
+class BulkWriteError(RuntimeError):
+    """Raised when some chunks of a bulk write still fail after retries. Carries the summary."""
+
+    def __init__(self, table_name: str, summary: Dict[str, Any]):
+        self.summary = summary
+        super().__init__(
+            f"{summary['rows_failed']} of {summary['rows_written'] + summary['rows_failed']} rows "
+            f"failed to write to '{table_name}' ({len(summary['failed_chunks'])} chunks)"
+        )
+
+def _json_ready(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Column-wise prep for to_json: datetimes become the same strings _to_records produces
+    (astype(str)), date/time objects become ISO strings, NaT stays null. Other columns are untouched;
+    to_json already writes NaN/None as null.
+    """
+    converted = {}
+    for col in chunk.columns:
+        values = chunk[col]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            converted[col] = values.astype(str).where(values.notna(), None)
+        elif values.dtype == object:
+            sample = values.dropna()
+            if not sample.empty and hasattr(sample.iloc[0], "isoformat"):
+                converted[col] = values.map(lambda v: v.isoformat() if hasattr(v, "isoformat") else v)
+    return chunk.assign(**converted) if converted else chunk
+
+def serialize_chunks(df: pd.DataFrame, chunk_size: int) -> Iterator[tuple]:
+    """Yield (offset, rows, JSON array bytes) per chunk, straight from the columns (no list of dicts)."""
+    for offset in range(0, len(df), chunk_size):
+        chunk = _json_ready(df.iloc[offset:offset + chunk_size])
+        # double_precision defaults to 10 decimals, which would truncate coordinates on every write
+        yield offset, len(chunk), chunk.to_json(orient="records", date_format="iso", double_precision=15).encode("utf-8")
+
+def _post_chunk(table_name: str, payload: bytes, op: str, on_conflict: Optional[str]):
+    """POST a pre-serialized JSON array to PostgREST, skipping the client's per-row encoding."""
+    session = getattr(getattr(supabase, "postgrest", None), "session", None)
+    if session is None:
+        # Clients without a raw HTTP session go through the query builder
+        rows = json.loads(payload)
+        table = supabase.table(table_name)
+        (table.upsert(rows, on_conflict=on_conflict) if op == "upsert" else table.insert(rows)).execute()
+        return
+    headers = {"Content-Type": "application/json", "Prefer": "return=minimal"}
+    params = {}
+    if op == "upsert":
+        headers["Prefer"] += ",resolution=merge-duplicates"
+        params["on_conflict"] = on_conflict
+    response = session.post(table_name, content=payload, headers=headers, params=params)
+    if response.status_code >= 300:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:300]}")
+
+def _write_chunk(table_name: str, payload: bytes, op: str,
+                 on_conflict: Optional[str], retries: int) -> Optional[str]:
+    """Send one chunk, retrying with backoff. Returns None on success, else the last error."""
+    error = None
+    for attempt in range(retries + 1):
+        try:
+            _post_chunk(table_name, payload, op, on_conflict)
+            return None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if attempt < retries:
+                time.sleep(WRITE_BACKOFF * (2 ** attempt))
+    return error
+
+def bulk_write(table_name: str, data: Union[pd.DataFrame, List[Dict[str, Any]]], op: str = "insert",
+               on_conflict: Optional[str] = None, chunk_size: Optional[int] = None,
+               max_workers: Optional[int] = None, retries: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Insert (or upsert on `on_conflict`) a DataFrame (or records) into a physical table in parallel chunks.
+    Chunks are serialized lazily, so at most ~2 x max_workers payloads are in memory at once.
+    Returns {"rows_written", "rows_failed", "chunks", "failed_chunks": [{"offset", "rows", "error"}]}.
+    """
+    if op not in ("insert", "upsert"):
+        raise ValueError(f"Unknown bulk write op '{op}'")
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    chunk_size = chunk_size or WRITE_CHUNK_SIZE
+    max_workers = max(1, max_workers or WRITE_WORKERS)
+    retries = WRITE_RETRIES if retries is None else retries
+
+    n_chunks = -(-len(df) // chunk_size)
+    summary = {"rows_written": 0, "rows_failed": 0, "chunks": n_chunks, "failed_chunks": []}
+    if not n_chunks:
+        return summary
+
+    def collect(offset, rows, future):
+        error = future.result()
+        if error is None:
+            summary["rows_written"] += rows
+        else:
+            summary["rows_failed"] += rows
+            summary["failed_chunks"].append({"offset": offset, "rows": rows, "error": error})
+            print(f"[BULK WRITE] Chunk at {offset} ({rows} rows) to '{table_name}' failed: {error}")
+
+    started = time.time()
+    in_flight = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, n_chunks)) as pool:
+        for offset, rows, payload in serialize_chunks(df, chunk_size):
+            in_flight.append((offset, rows, pool.submit(_write_chunk, table_name, payload, op, on_conflict, retries)))
+            if len(in_flight) >= 2 * max_workers:
+                collect(*in_flight.pop(0))
+        for item in in_flight:
+            collect(*item)
+
+    if summary["rows_written"]:
+        table_cache.invalidate(_logical_table(table_name))
+    print(f"[BULK WRITE] {op} {summary['rows_written']}/{len(df)} rows into '{table_name}' "
+          f"in {summary['chunks']} chunks ({max_workers} workers, {time.time() - started:.2f}s)")
+    return summary
+
+def save_data(df: pd.DataFrame, sheet_name: str, mode: str = "overwrite",
+              key: Union[str, List[str]] = "activity_id",
+              scope: Optional[Dict[str, Any]] = None, chunk_size: Optional[int] = None,
+              max_workers: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Save DataFrame to Supabase table.
+
+    mode="overwrite": mimics the GSheets 'Overwrite' behavior by deleting all rows first.
+    mode="upsert": diff-aware. Rows are matched on the natural `key` (needs a unique index on it,
+        see `generate_sql.py upsert_keys`);
+        new or changed rows are upserted, unchanged rows are skipped, and rows inside `scope`
+        (load_data-style filters, e.g. a date range or mr_id list) that are missing from df are
+        deleted. Rows outside `scope` are never touched.
+    mode="append": inserts df as-is; existing rows are neither compared nor deleted.
+
+    Rows are written by bulk_write (`chunk_size` rows per request, `max_workers` in flight).
+    Returns the write summary; raises BulkWriteError if any chunk still fails after retries.
     """
     if not supabase:
         print("Supabase not configured.")
         return
 
-    table_name = TABLE_MAP.get(sheet_name, sheet_name.lower())
+    table_name = get_table_name(sheet_name)
+
+    if mode == "upsert":
+        return _save_upsert(df, sheet_name, table_name, [key] if isinstance(key, str) else list(key), scope,
+                            chunk_size, max_workers)
+    if mode not in ("overwrite", "append"):
+        raise ValueError(f"Unknown save mode '{mode}'")
 
     if df.empty:
         return
 
+    if mode == "append":
+        summary = bulk_write(table_name, df, chunk_size=chunk_size, max_workers=max_workers)
+        if summary["rows_failed"]:
+            raise BulkWriteError(table_name, summary)
+        print(f"Appended {len(df)} rows to '{table_name}'")
+        return summary
+
+    # 1. Delete all existing records (Logic: ID is not null)
+    # Note: This is dangerous for production but matches 'Sheet Overwrite' logic.
+    # Prefer mode="upsert" when the table has a natural key.
+    # 'id' is created by Supabase usually.
+    supabase.table(table_name).delete().neq("id", 0).execute() # 0 is standard dummy for 'all non-zero'
+    table_cache.invalidate(_logical_table(table_name))
+
+    # 2. Insert in parallel chunks, serialized straight from the columns
+    summary = bulk_write(table_name, df, chunk_size=chunk_size, max_workers=max_workers)
+    if summary["rows_failed"]:
+        raise BulkWriteError(table_name, summary)
+
+    print(f"Saved {len(df)} rows to '{table_name}'")
+    return summary
+
+def _save_upsert(df: pd.DataFrame, sheet_name: str, table_name: str,
+                 keys: List[str], scope: Optional[Dict[str, Any]],
+                 chunk_size: Optional[int] = None, max_workers: Optional[int] = None) -> Dict[str, Any]:
+    records = _to_records(df) if not df.empty else []
+    missing_keys = [k for k in keys if records and k not in records[0]]
+    if missing_keys:
+        raise ValueError(f"Key column(s) {missing_keys} not in DataFrame")
+
+    # 1. Current rows in scope, projected to the columns we write
+    columns = list(dict.fromkeys(keys + list(df.columns)))
+    existing = load_data(sheet_name, columns=columns, filters=scope, cache=False) if columns else pd.DataFrame()
+    existing_rows = {}
+    if not existing.empty:
+        for row in existing.to_dict(orient='records'):
+            existing_rows[_row_key(row, keys)] = row
+
+    # 2. New or changed rows
+    changed = []
+    for pos, record in enumerate(records):
+        current = existing_rows.get(_row_key(record, keys))
+        if current is None or any(_normalize_value(record[c]) != _normalize_value(current.get(c)) for c in record):
+            changed.append(pos)
+
+    write = bulk_write(table_name, df.iloc[changed], op="upsert", on_conflict=",".join(keys),
+                       chunk_size=chunk_size, max_workers=max_workers)
+
+    # 3. Rows in scope that disappeared from df (skipped if the write was partial, so nothing is lost)
+    new_keys = {_row_key(r, keys) for r in records}
+    stale = [k for k in existing_rows if k not in new_keys] if not write["rows_failed"] else []
+    if stale and len(keys) == 1:
+        stale_ids = [existing_rows[k][keys[0]] for k in stale]
+        for i in range(0, len(stale_ids), IN_FILTER_CHUNK):
+            query = supabase.table(table_name).delete().in_(keys[0], stale_ids[i:i + IN_FILTER_CHUNK])
+            apply_filters(query, scope).execute()
+    elif stale:
+        for k in stale:
+            query = supabase.table(table_name).delete()
+            for col in keys:
+                query = query.eq(col, existing_rows[k][col])
+            apply_filters(query, scope).execute()
+    if stale:
+        table_cache.invalidate(_logical_table(table_name))
+
+    summary = dict(write, upserted=write["rows_written"], unchanged=len(records) - len(changed), deleted=len(stale))
+    if write["rows_failed"]:
+        raise BulkWriteError(table_name, summary)
+    print(f"Upserted {summary['upserted']} rows, deleted {summary['deleted']}, {summary['unchanged']} unchanged in '{table_name}'")
+    return summary
+
+def _snapshot_logical_name(sheet_name: str) -> str:
+    logical = TABLE_MAP.get(sheet_name, sheet_name.lower())
+    if logical not in SNAPSHOT_TABLES:
+        raise ValueError(f"'{sheet_name}' is not a snapshot-managed table")
+    return logical
+
+def publish_snapshot(df: pd.DataFrame, sheet_name: str = "Master_Schedule",
+                     keep: Optional[Dict[str, Any]] = None,
+                     meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Publish df as a new snapshot of a double-buffered table.
+    Rows of the current snapshot matching `keep` (load_data-style filters) are carried over,
+    the inactive physical table is refilled, then the pointer is flipped in one UPDATE.
+    Raises RuntimeError if the snapshot tables are not set up, BulkWriteError if some rows
+    could not be written (the pointer is only flipped after every row is written); a failed
+    read of the carried-over rows propagates before anything is written.
+    Carried rows are copied as read: a status update made to one of them between that read and
+    the pointer flip lands in the old snapshot only and is lost. Publish while MRs are idle.
+    """
+    logical = _snapshot_logical_name(sheet_name)
+    if not supabase:
+        raise RuntimeError("Supabase not configured")
+
     try:
-        # 1. Convert DataFrame to records
-        # Handle NaN values which JSON doesn't like
-        df_clean = df.where(pd.notnull(df), None)
-        # Convert Timestamp/Date to strings
-        for col in df_clean.columns:
-            if pd.api.types.is_datetime64_any_dtype(df_clean[col]):
-                df_clean[col] = df_clean[col].astype(str)
-        
-        records = df_clean.to_dict(orient='records')
-        
-        # 2. Delete all existing records (Logic: ID is not null)
-        # Note: This is dangerous for production but matches 'Sheet Overwrite' logic.
-        # Ideally, we should use Upsert if we have Primary Keys.
-        # But 'Master_Schedule' behaves like a snapshot in the current app.
-        
-        # Batch delete if needed, but for now simple delete
-        # Requires a column to match. Assuming 'id' exists or we use a always-true condition if possible.
-        # Supabase-py doesn't support 'delete all' easily without a where clause.
-        # We can try to delete where id > 0 (assuming numeric ID)
-        
-        # Hack: Check if 'id' is in columns, else use a known column
-        # Or better: UPSERT based on a unique key if we have one.
-        
-        # Strategy: upsert to avoid deletion issues, IF we have `activity_id` or similar.
-        # However, if rows were removed in DF, upsert won't remove them from DB.
-        
-        # Let's try to delete everything first.
-        # 'id' is created by Supabase usually.
-        supabase.table(table_name).delete().neq("id", 0).execute() # 0 is standard dummy for 'all non-zero'
-        
-        # 3. Insert in chunks
-        chunk_size = 1000
-        for i in range(0, len(records), chunk_size):
-            chunk = records[i:i + chunk_size]
-            supabase.table(table_name).insert(chunk).execute()
-            
-        print(f"Saved {len(records)} rows to '{table_name}'")
+        pointer = _read_pointer(logical)
+    except Exception as e:
+        raise RuntimeError(f"Snapshot pointer table '{POINTER_TABLE}' unavailable: {e}")
+
+    slots = SNAPSHOT_TABLES[logical]
+    active = pointer["physical_name"] if pointer and pointer.get("physical_name") in slots else slots[0]
+    target = slots[1] if active == slots[0] else slots[0]
+
+    # 1. Rows carried over from the active snapshot (e.g. past days outside the regenerated window)
+    frames = [df]
+    if keep:
+        # An empty frame here would publish a snapshot without them, so read errors must raise
+        carried = fetch_data(sheet_name, filters=keep)
+        if not carried.empty:
+            frames.insert(0, carried.drop(columns=['id', 'created_at'], errors='ignore'))
+    snapshot_df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else df
+
+    # 2. Refill the inactive table; readers are still on `active`
+    try:
+        supabase.table(target).delete().neq("id", 0).execute()
+    except Exception as e:
+        raise RuntimeError(f"Clearing snapshot table '{target}' failed, pointer not flipped: {e}")
+    write = bulk_write(target, snapshot_df)
+    if write["rows_failed"]:
+        raise BulkWriteError(target, write)
+
+    # 3. Flip the pointer (single-row upsert = atomic for readers)
+    snapshot_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:6]}"
+    new_pointer = {
+        "logical_name": logical,
+        "physical_name": target,
+        "snapshot_id": snapshot_id,
+        "previous_physical_name": active,
+        "previous_snapshot_id": pointer.get("snapshot_id") if pointer else None,
+        "published_at": datetime.now(timezone.utc).isoformat(),
+        "row_count": len(snapshot_df),
+        "snapshot_meta": meta or {},
+    }
+    supabase.table(POINTER_TABLE).upsert(new_pointer, on_conflict="logical_name").execute()
+    _pointer_cache.pop(logical, None)
+    table_cache.invalidate(logical)
+
+    print(f"[SNAPSHOT] Published {snapshot_id} ({len(snapshot_df)} rows) to '{target}', previous '{active}'")
+    return new_pointer
+
+def get_snapshot_info(sheet_name: str = "Master_Schedule") -> Optional[Dict[str, Any]]:
+    """Current pointer row (active + previous snapshot), or None before the first publication."""
+    return _read_pointer(_snapshot_logical_name(sheet_name))
+
+def rollback_snapshot(sheet_name: str = "Master_Schedule") -> Dict[str, Any]:
+    """Point readers back at the previous snapshot (the current one becomes 'previous')."""
+    logical = _snapshot_logical_name(sheet_name)
+    pointer = _read_pointer(logical)
+    if not pointer or not pointer.get("previous_physical_name"):
+        raise RuntimeError("No previous snapshot to roll back to")
+
+    swapped = dict(pointer)
+    swapped["physical_name"], swapped["previous_physical_name"] = pointer["previous_physical_name"], pointer["physical_name"]
+    swapped["snapshot_id"], swapped["previous_snapshot_id"] = pointer.get("previous_snapshot_id"), pointer.get("snapshot_id")
+    swapped["published_at"] = datetime.now(timezone.utc).isoformat()
+    supabase.table(POINTER_TABLE).upsert(swapped, on_conflict="logical_name").execute()
+    _pointer_cache.pop(logical, None)
+    table_cache.invalidate(logical)
+
+    print(f"[SNAPSHOT] Rolled back '{logical}' to '{swapped['physical_name']}' ({swapped['snapshot_id']})")
+    return swapped
+
+def diff_snapshots(sheet_name: str = "Master_Schedule", key: str = "activity_id",
+                   compare: Optional[List[str]] = None, sample_size: int = 50) -> Dict[str, Any]:
+    """Compare the active and previous snapshots on `key`: added / removed / changed rows."""
+    logical = _snapshot_logical_name(sheet_name)
+    pointer = _read_pointer(logical)
+    if not pointer or not pointer.get("previous_physical_name"):
+        raise RuntimeError("No previous snapshot to compare against")
+
+    compare = compare or ["mr_id", "date", "customer_id", "start_time", "status"]
+    columns = [key] + compare
+
+    def frame(table):
+        chunks = list(iter_data(table, columns=columns, resolve=False))
+        df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+        return df.drop_duplicates(subset=[key]).set_index(key)
+
+    current = frame(pointer["physical_name"])
+    previous = frame(pointer["previous_physical_name"])
+
+    added = current.index.difference(previous.index)
+    removed = previous.index.difference(current.index)
+    common = current.index.intersection(previous.index)
+    changed_mask = (current.loc[common, compare].astype(str) != previous.loc[common, compare].astype(str)).any(axis=1)
+    changed = common[changed_mask.values] if len(common) else common
 
+    return {
+        "current_snapshot": pointer.get("snapshot_id"),
+        "previous_snapshot": pointer.get("previous_snapshot_id"),
+        "current_rows": len(current),
+        "previous_rows": len(previous),
+        "added": len(added),
+        "removed": len(removed),
+        "changed": len(changed),
+        "sample_added": added[:sample_size].tolist(),
+        "sample_removed": removed[:sample_size].tolist(),
+        "sample_changed": changed[:sample_size].tolist(),
+    }
+
+# ─── SCHEDULE RUN LOG ───
+# Every schedule write (full publication, window upsert, rolling append, single-MR reschedule)
+# appends one row with the seed it was generated from, so any schedule in the table can be
+# regenerated exactly. Full publications also keep the seed in the pointer's snapshot_meta.
+SCHEDULE_RUNS_TABLE = "schedule_runs"
+
+def log_schedule_run(mode: str, seed: int, window_start: str, window_end: str,
+                     rows_written: int, mr_id: Optional[str] = None,
+                     meta: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Append a run-log row; returns it, or None when it could not be written. The schedule itself is
+    already written at this point, so a missing log table is reported but does not fail the run.
+    """
+    if not supabase:
+        return None
+    row = {
+        "mode": mode,
+        "seed": int(seed),
+        "mr_id": mr_id,
+        "window_start": str(window_start),
+        "window_end": str(window_end),
+        "rows_written": int(rows_written),
+        "run_meta": meta or {},
+    }
+    try:
+        data = supabase.table(SCHEDULE_RUNS_TABLE).insert(row).execute().data
     except Exception as e:
-        print(f"Error saving to table '{table_name}': {e}")
+        print(f"[SCHEDULE RUN] Could not record seed {seed} for {mode} run in '{SCHEDULE_RUNS_TABLE}': {e}")
+        return None
+    print(f"[SCHEDULE RUN] Recorded {mode} run (seed {seed}, {window_start} to {window_end})")
+    return data[0] if data else row
+
+# ─── DAILY SCHEDULE ───
+# The MR app's daily view merges Activities (done / logged visits) over Master_Schedule (plan)
+# for one MR and date. get_daily_schedule() does the merge in Postgres so the endpoint needs one
+# round trip; merge_daily_rows() is the same merge in Python, used when the function is missing.
+DAILY_SCHEDULE_RPC = "get_daily_schedule"
+DAILY_ENRICH_KEYS = ['travel_duration_min', 'distance_km', 'suggested_talking_points']
+DAILY_RPC_RETRY = float(os.getenv("DAILY_RPC_RETRY", "300"))  # seconds before retrying a missing RPC
+# PostgREST "function not in schema cache" / Postgres undefined_function: the only errors that
+# mean the function is not installed; anything else (bad input, timeouts) is raised
+DAILY_RPC_MISSING_CODES = {"PGRST202", "42883"}
+_daily_rpc_retry_at = 0.0
+
+def is_invalid_input(error: Exception) -> bool:
+    """Postgres data exception (class 22: malformed date, bad number...) = the caller's input."""
+    return str(getattr(error, "code", None) or "").startswith("22")
+
+DAILY_SCHEDULE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION get_daily_schedule(p_mr_id text, p_date text, p_master_table text DEFAULT 'master_schedule')
+RETURNS jsonb
+LANGUAGE plpgsql STABLE
+AS $fn$
+DECLARE
+  result jsonb;
+  master_date_type text;
+  activity_date_type text;
+BEGIN
+  -- Master_Schedule is double-buffered: the caller passes the active copy (see resolve_table)
+  IF p_master_table NOT IN ('master_schedule', 'master_schedule_b') THEN
+    RAISE EXCEPTION 'Unknown master schedule table %', p_master_table;
+  END IF;
+  -- Compare `date` in the column's own type (date, or text on older schemas) so the
+  -- (mr_id, date) indexes stay usable
+  SELECT format_type(atttypid, atttypmod) INTO master_date_type
+  FROM pg_attribute WHERE attrelid = p_master_table::regclass AND attname = 'date';
+  SELECT format_type(atttypid, atttypmod) INTO activity_date_type
+  FROM pg_attribute WHERE attrelid = 'activities'::regclass AND attname = 'date';
+  EXECUTE format($q$
+    WITH master AS (
+      SELECT to_jsonb(t) AS r, t.id AS ord FROM %1$I t
+      WHERE ($1 IS NULL OR t.mr_id = $1) AND t.date = $2::%2$s
+    ),
+    master_by_id AS (
+      -- Last row per activity_id wins, like merge_daily_rows' lookup dict
+      SELECT DISTINCT ON (r->>'activity_id') r->>'activity_id' AS activity_id, r
+      FROM master ORDER BY r->>'activity_id', ord DESC
+    ),
+    acts AS (
+      SELECT to_jsonb(t) AS r, t.id AS ord FROM activities t
+      WHERE ($1 IS NULL OR t.mr_id = $1) AND t.date = $2::%3$s
+    ),
+    renamed AS (
+      SELECT CASE WHEN r ? 'activity_status'
+                  THEN (r - 'activity_status') || jsonb_build_object('status', r->'activity_status')
+                  ELSE r END AS r, ord
+      FROM acts
+    ),
+    enriched AS (
+      -- Fill travel/distance/talking points missing on the activity from its planned row
+      SELECT a.r || COALESCE((
+               SELECT jsonb_object_agg(k, m.r->k)
+               FROM unnest(ARRAY['travel_duration_min', 'distance_km', 'suggested_talking_points']) AS k
+               WHERE m.r ? k AND (NOT (a.r ? k) OR a.r->k = 'null'::jsonb OR a.r->>k = '')
+             ), '{}'::jsonb) AS r, a.ord
+      FROM renamed a
+      LEFT JOIN master_by_id m ON a.r ? 'activity_id' AND m.activity_id IS NOT DISTINCT FROM a.r->>'activity_id'
+    ),
+    merged AS (
+      SELECT r, 0 AS src, ord FROM enriched
+      UNION ALL
+      SELECT r, 1 AS src, ord FROM master
+    ),
+    deduped AS (
+      -- One row per activity_id; activities take precedence over the plan
+      SELECT DISTINCT ON (r->>'activity_id') r, src, ord
+      FROM merged ORDER BY r->>'activity_id', src, ord
+    )
+    SELECT COALESCE(jsonb_agg(r ORDER BY src, ord), '[]'::jsonb) FROM deduped
+  $q$, p_master_table, master_date_type, activity_date_type) INTO result USING p_mr_id, p_date;
+  RETURN result;
+END;
+$fn$;
+grant execute on function get_daily_schedule(text, text, text) to anon, authenticated;
+notify pgrst, 'reload schema';
+"""
+
+def merge_daily_rows(master_rows: List[Dict[str, Any]], activity_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merge one day's Master_Schedule and Activities rows (same result as get_daily_schedule):
+    activity_status is renamed to status, activities missing travel/distance/talking points get them
+    from the planned row, and rows are de-duplicated on activity_id with activities first.
+    """
+    activities = []
+    for row in activity_rows:
+        row = dict(row)
+        if 'activity_status' in row:
+            row['status'] = row.pop('activity_status')
+        activities.append(row)
+
+    if activities and master_rows:
+        master_map = {row['activity_id']: row for row in master_rows}
+        for row in activities:
+            m_row = master_map.get(row['activity_id']) if 'activity_id' in row else None
+            if m_row is None:
+                continue
+            for key in DAILY_ENRICH_KEYS:
+                if (key not in row or row[key] is None or row[key] == "") and key in m_row:
+                    row[key] = m_row[key]
+
+    rows = activities + [dict(row) for row in master_rows]
+    if not any('activity_id' in row for row in rows):
+        return rows
+    merged, seen = [], set()
+    for row in rows:
+        key = row.get('activity_id')
+        if key not in seen:
+            seen.add(key)
+            merged.append(row)
+    return merged
+
+def fetch_daily_rows(mr_id: Optional[str], date: str) -> List[Dict[str, Any]]:
+    """
+    Merged daily schedule rows for one MR (None = every MR) on `date`: one RPC round trip,
+    or two filtered queries + merge_daily_rows while the function is not installed.
+    Other database errors propagate (see is_invalid_input for the caller's mistakes).
+    """
+    global _daily_rpc_retry_at
+    master_table = resolve_table("master_schedule")
+
+    if time.time() >= _daily_rpc_retry_at:
+        try:
+            params = {"p_mr_id": mr_id, "p_date": date, "p_master_table": master_table}
+            return supabase.rpc(DAILY_SCHEDULE_RPC, params).execute().data or []
+        except Exception as e:
+            if getattr(e, "code", None) not in DAILY_RPC_MISSING_CODES:
+                raise
+            _daily_rpc_retry_at = time.time() + DAILY_RPC_RETRY
+            print(f"[DAILY] RPC '{DAILY_SCHEDULE_RPC}' not installed, using two queries for {DAILY_RPC_RETRY:.0f}s: {e}")
+
+    filters = {"date": date} if mr_id is None else {"mr_id": mr_id, "date": date}
+    master = apply_filters(supabase.table(master_table).select("*"), filters).execute().data or []
+    activities = apply_filters(supabase.table("activities").select("*"), filters).execute().data or []
+    return merge_daily_rows(master, activities)
@@ -0,0 +1,161 @@
+# app/services/travel_cache.py
+import os
+import sqlite3
+import threading
+import time
+
+# On-disk cache of OSRM leg results (distance_km, duration_min) keyed by rounded
+# coordinates, so repeated schedule runs over the same contact base skip the network.
+TRAVEL_CACHE_PATH = os.getenv(
+    "TRAVEL_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "travel_cache.sqlite3")
+)
+TRAVEL_CACHE_MAX_ENTRIES = int(os.getenv("TRAVEL_CACHE_MAX_ENTRIES", "200000"))
+COORD_PRECISION = 4  # ~11 m, well below routing accuracy
+
+# Hit timestamps are buffered and written in batches to keep lookups cheap
+TOUCH_FLUSH_SIZE = 256
+
+
+def make_key(lat1, lon1, lat2, lon2):
+    """Cache key for a directed leg (OSRM distances are not symmetric)."""
+    return (
+        round(float(lat1), COORD_PRECISION), round(float(lon1), COORD_PRECISION),
+        round(float(lat2), COORD_PRECISION), round(float(lon2), COORD_PRECISION),
+    )
+
+
+class TravelCache:
+    """
+    SQLite-backed leg cache with least-recently-used eviction.
+    Safe to share between the threads of one process; each worker process opens its own connection.
+    """
+
+    def __init__(self, path=TRAVEL_CACHE_PATH, max_entries=TRAVEL_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn = None
+        self._pid = None
+        self._pending_touches = {}
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Reconnect after fork so processes never share a SQLite handle
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS legs ("
+                " lat1 REAL, lon1 REAL, lat2 REAL, lon2 REAL,"
+                " distance_km REAL NOT NULL, duration_min REAL NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (lat1, lon1, lat2, lon2))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_legs_last_used ON legs (last_used)")
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+            self._pending_touches = {}
+        return self._conn
+
+    def get(self, lat1, lon1, lat2, lon2):
+        """Return (distance_km, duration_min) or None."""
+        key = make_key(lat1, lon1, lat2, lon2)
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT distance_km, duration_min FROM legs WHERE lat1=? AND lon1=? AND lat2=? AND lon2=?",
+                    key
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"[TRAVEL CACHE] Lookup failed: {e}")
+                self.misses += 1
+                return None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._pending_touches[key] = time.time()
+            if len(self._pending_touches) >= TOUCH_FLUSH_SIZE:
+                self._flush_touches(conn)
+            return row[0], row[1]
+
+    def put(self, lat1, lon1, lat2, lon2, distance_km, duration_min):
+        self.put_many([((lat1, lon1, lat2, lon2), (distance_km, duration_min))])
+
+    def put_many(self, items):
+        """Store [((lat1, lon1, lat2, lon2), (distance_km, duration_min)), ...]."""
+        now = time.time()
+        rows = [make_key(*coords) + (float(dist), float(dur), now) for coords, (dist, dur) in items]
+        if not rows:
+            return
+        with self._lock:
+            try:
+                conn = self._connect()
+                self._flush_touches(conn, commit=False)
+                conn.executemany("INSERT OR REPLACE INTO legs VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"[TRAVEL CACHE] Write failed: {e}")
+
+    def _flush_touches(self, conn, commit=True):
+        if not self._pending_touches:
+            return
+        conn.executemany(
+            "UPDATE legs SET last_used=? WHERE lat1=? AND lon1=? AND lat2=? AND lon2=?",
+            [(ts,) + key for key, ts in self._pending_touches.items()]
+        )
+        self._pending_touches = {}
+        if commit:
+            conn.commit()
+
+    def _evict(self, conn):
+        # Trim to 90% of the bound so eviction runs in batches, not on every insert
+        count = conn.execute("SELECT COUNT(*) FROM legs").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - int(self.max_entries * 0.9)
+        conn.execute(
+            "DELETE FROM legs WHERE rowid IN (SELECT rowid FROM legs ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        self.evictions += excess
+
+    def stats(self):
+        with self._lock:
+            try:
+                conn = self._connect()
+                self._flush_touches(conn)
+                entries = conn.execute("SELECT COUNT(*) FROM legs").fetchone()[0]
+            except sqlite3.Error:
+                entries = None
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM legs")
+            conn.commit()
+            self._pending_touches = {}
+            self.hits = self.misses = self.evictions = 0
+
+
+# Shared instance used by the schedule engine
+travel_cache = TravelCache()
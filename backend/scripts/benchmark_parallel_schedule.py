@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.logic import run_schedule_logic_for_fleet, zone_cache
+from synthetic_fleet import make_fleet, ZONES
+
+# Fleet schedule generation on 1..N worker processes over a synthetic fleet.
+# Routing uses the haversine backend so the numbers measure CPU work, not OSRM, and a fixed
+# seed so every worker count must produce the same schedules.
+# Usage: python scripts/benchmark_parallel_schedule.py [n_mrs] [max_workers]
+
+SEED = 42
+
+
+def main():
+    n_mrs = int(sys.argv[1]) if len(sys.argv) > 1 else 48
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 2)
+    users, contacts, activities = make_fleet(n_mrs)
+    today = pd.Timestamp.now().normalize()
+    print(f"--- Parallel schedule benchmark ({n_mrs} MRs, {len(contacts):,} contacts, {len(ZONES)} zones) ---")
+
+    # Warm the zone cache and model so every run times only per-MR schedule building
+    run_schedule_logic_for_fleet(users, contacts, activities, today, routing="haversine", workers=1, seed=SEED)
+
+    worker_counts = sorted({1, 2, 4, max_workers} & set(range(1, max_workers + 1)))
+    baseline, reference = None, None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        schedules = run_schedule_logic_for_fleet(users, contacts, activities, today, routing="haversine", workers=workers, seed=SEED)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        merged = pd.concat(schedules, ignore_index=True)
+        reference = merged if reference is None else reference
+        print(f"{workers:2d} workers: {elapsed:7.2f}s | {baseline / elapsed:5.2f}x | {len(merged):,} rows | "
+              f"{'✅' if merged.equals(reference) else '❌'} identical to 1 worker")
+
+    print(f"Zone cache: {zone_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
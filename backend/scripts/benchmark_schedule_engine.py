@@ -0,0 +1,172 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import platform
+import subprocess
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.logic import (
+    HaversineBackend,
+    prepare_activities, build_customer_features, prepare_scoring_frame, apply_priority_scores,
+    compute_data_version, build_mr_schedule, mr_rng, zone_cache,
+    run_schedule_logic_for_single_mr, run_schedule_logic_for_fleet
+)
+from app.services.model_registry import ModelRegistry, model_registry
+from synthetic_fleet import make_fleet
+
+# Offline benchmark of the schedule engine, stage by stage, on synthetic fleets.
+# Nothing touches Supabase or OSRM: frames come from synthetic_fleet.make_fleet around real
+# localities, routing goes through a timed haversine stub and models are trained into a temp dir.
+# Each scale is "<mrs>" (activities from SCALE_ACTIVITIES, else 1000 per MR) or "<mrs>:<activities>".
+# Usage: python scripts/benchmark_schedule_engine.py [scales] [report.json]
+#   e.g. python scripts/benchmark_schedule_engine.py 10,100,1000
+#        python scripts/benchmark_schedule_engine.py 100:250000 benchmarks/run.json
+
+SEED = 42
+DEFAULT_SCALES = "10,100"
+SCALE_ACTIVITIES = {10: 10_000, 100: 100_000, 1000: 1_000_000}
+CONTACTS_PER_MR = 40
+MIN_CONTACTS = 300
+REPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+
+
+class TimedRouter(HaversineBackend):
+    """Stub router: the offline haversine estimate, plus call count and time spent."""
+    name = "haversine"
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.seconds = 0.0
+
+    def matrix(self, lats, lons):
+        start = time.perf_counter()
+        try:
+            return super().matrix(lats, lons)
+        finally:
+            self.calls += 1
+            self.seconds += time.perf_counter() - start
+
+
+def make_dataset(n_mrs, n_activities, seed=SEED):
+    """Users / contacts / activities at benchmark scale, placed around real localities."""
+    return make_fleet(n_mrs, n_contacts=max(n_mrs * CONTACTS_PER_MR, MIN_CONTACTS),
+                      n_activities=n_activities, seed=seed, localities=True)
+
+
+def parse_scales(arg):
+    scales = []
+    for item in arg.split(","):
+        mrs, _, acts = item.strip().partition(":")
+        mrs = int(mrs)
+        scales.append((mrs, int(acts) if acts else SCALE_ACTIVITIES.get(mrs, mrs * 1000)))
+    return scales
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def timed(stages, name, fn):
+    start = time.perf_counter()
+    result = fn()
+    stages[name] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def run_scale(n_mrs, n_activities, model_dir):
+    stages = {}
+    users, contacts, activities = timed(stages, "synthesize", lambda: make_dataset(n_mrs, n_activities))
+    today = pd.Timestamp.now().normalize()
+    print(f"--- {n_mrs} MRs | {len(contacts):,} contacts | {len(activities):,} activities ---")
+
+    # Engine stages, called one by one the way run_schedule_logic_for_fleet chains them
+    features = timed(stages, "features", lambda: build_customer_features(prepare_activities(activities), today))
+    prepared = timed(stages, "scoring", lambda: prepare_scoring_frame(contacts, features))
+    registry = ModelRegistry(os.path.join(model_dir, f"stages_{n_mrs}"))
+    snapshot = compute_data_version(contacts, activities)
+    model = timed(stages, "model", lambda: registry.get_model(snapshot, prepared))
+    scored = timed(stages, "predict", lambda: {
+        zone: apply_priority_scores(group.copy(), model)
+        for zone, group in prepared.groupby(prepared['Zone'].str.upper())
+    })
+
+    router = TimedRouter()
+    schedules = []
+    start = time.perf_counter()
+    for pos in range(len(users)):
+        mr_info = users.iloc[[pos]]
+        mr_id = mr_info['mr_id'].iloc[0]
+        schedules.append(build_mr_schedule(mr_id, mr_info, scored[mr_info['zone'].iloc[0].upper()], today,
+                                           routing=router, rng=mr_rng(SEED, mr_id)))
+    loop_seconds = time.perf_counter() - start
+    stages["daily_loop"] = round(loop_seconds - router.seconds, 4)
+    stages["routing"] = round(router.seconds, 4)
+    rows = sum(len(s) for s in schedules)
+
+    # End-to-end entry points with cold caches, for comparison with the sum of the stages
+    zone_cache.clear()
+    model_registry.current = None
+    model_registry.model_dir = os.path.join(model_dir, f"e2e_{n_mrs}")
+    first_mr = users['mr_id'].iloc[0]
+    timed(stages, "single_mr", lambda: run_schedule_logic_for_single_mr(
+        first_mr, users, contacts, activities, today, routing=HaversineBackend(), seed=SEED))
+    zone_cache.clear()
+    timed(stages, "fleet", lambda: run_schedule_logic_for_fleet(
+        users, contacts, activities, today, routing=HaversineBackend(), workers=1, seed=SEED))
+
+    engine = sum(stages[s] for s in ("features", "scoring", "model", "predict", "daily_loop", "routing"))
+    print("   " + " | ".join(f"{name} {secs:.2f}s" for name, secs in stages.items()))
+    return {
+        "mrs": n_mrs,
+        "contacts": len(contacts),
+        "activities": len(activities),
+        "schedule_rows": rows,
+        "routing_calls": router.calls,
+        "stages_s": stages,
+        "engine_total_s": round(engine, 4),
+        "per_mr_ms": round((stages["daily_loop"] + stages["routing"]) / max(n_mrs, 1) * 1000, 2),
+    }
+
+
+def main():
+    scales = parse_scales(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SCALES)
+    output = sys.argv[2] if len(sys.argv) > 2 else os.path.join(
+        REPORT_DIR, f"schedule_engine_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    print(f"--- Schedule engine benchmark ({', '.join(f'{m} MRs/{a:,} acts' for m, a in scales)}) ---")
+
+    with tempfile.TemporaryDirectory(prefix="bench_models_") as model_dir:
+        runs = [run_scale(n_mrs, n_activities, model_dir) for n_mrs, n_activities in scales]
+
+    report = {
+        "benchmark": "schedule_engine",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "cpu_count": os.cpu_count(),
+        "router": "haversine (timed stub)",
+        "seed": SEED,
+        "runs": runs,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
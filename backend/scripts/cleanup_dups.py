@@ -7,38 +7,25 @@ from datetime import datetime
 # Add parent directory to path to import app modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.services.supabase_db import supabase
+from app.services.supabase_db import supabase, iter_data, resolve_table
 
 def fetch_all_rows(table_name):
-    """Fetch all rows using pagination"""
-    all_data = []
-    chunk_size = 1000
-    start = 0
-    
-    while True:
-        print(f"Fetching {table_name} rows {start} to {start+chunk_size}...")
-        response = supabase.table(table_name).select("*").range(start, start + chunk_size - 1).execute()
-        data = response.data
-        if not data:
-            break
-        all_data.extend(data)
-        if len(data) < chunk_size:
-            break
-        start += chunk_size
-        
-    return all_data
+    """Fetch all rows of a physical table using pagination (read errors propagate)"""
+    print(f"Fetching {table_name} rows...")
+    chunks = list(iter_data(table_name, resolve=False))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
 
 def cleanup_table(table_name):
+    # Snapshot tables (master_schedule) are double-buffered: read and delete the active copy
+    table_name = resolve_table(table_name)
     print(f"\n--- Cleaning {table_name} ---")
     
     # 1. Fetch all data
-    data = fetch_all_rows(table_name)
-    print(f"Total rows in DB: {len(data)}")
+    df = fetch_all_rows(table_name)
+    print(f"Total rows in DB: {len(df)}")
     
-    if not data:
+    if df.empty:
         return
-
-    df = pd.DataFrame(data)
     
     # Define columns that constitute a "duplicate" visit
     # Same MR, Same Customer, Same Date
@@ -7,10 +7,12 @@ from dotenv import load_dotenv
 # Add parent dir to path to import gsheets service
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.services.gsheets import load_data as load_gsheets
+from app.services.supabase_db import DAILY_SCHEDULE_FUNCTION_SQL, DAILY_SCHEDULE_RPC
 
 load_dotenv()
 
+# Usage: python scripts/generate_sql.py [table_name | get_daily_schedule | indexes | upsert_keys | schedule_runs]
+
 SHEETS_TO_TABLES = {
     "User_Master": "users",
     "Contacts": "contacts",
@@ -18,11 +20,38 @@ SHEETS_TO_TABLES = {
     "Master_Schedule": "master_schedule"
 }
 
+# Hot paths filter master_schedule / activities by mr_id + date (daily view), by date range +
+# mr_id ILIKE (reports) and master_schedule by activity_id (status updates; upserts need it
+# unique). Index names follow Postgres' own <table>_<columns>_idx scheme, so copies made with
+# LIKE ... INCLUDING ALL match.
+TABLE_INDEXES = {
+    "master_schedule": [("mr_id", "date"), ("date",)],
+    "activities": [("mr_id", "date"), ("date",)],
+}
+UNIQUE_INDEXES = {
+    "master_schedule": ["activity_id"],
+}
+# Reports match mr_id with ILIKE (case-insensitive), which only a trigram index can serve
+TRIGRAM_INDEXES = {
+    "master_schedule": ["mr_id"],
+    "activities": ["mr_id"],
+}
+# Physical copies of double-buffered tables (see generate_snapshot_schema)
+TABLE_COPIES = {
+    "master_schedule": ["master_schedule_b"],
+}
+
 def clean_column_name(col: str) -> str:
     return col.strip().lower().replace(" ", "_").replace(".", "")
 
-def get_sql_type(dtype):
-    if pd.api.types.is_integer_dtype(dtype):
+def is_date_column(col: str) -> bool:
+    # Sheet dates arrive as ISO strings; typed as DATE they compare and index as dates
+    return col == "date" or col.endswith("_date")
+
+def get_sql_type(dtype, col: str = ""):
+    if is_date_column(col):
+        return "date"
+    elif pd.api.types.is_integer_dtype(dtype):
         return "bigint"
     elif pd.api.types.is_float_dtype(dtype):
         return "float"
@@ -31,7 +60,38 @@ def get_sql_type(dtype):
     else:
         return "text"
 
+def index_statements(table_name, physical_name=None):
+    """CREATE INDEX statements for a logical table (on `physical_name` when given)."""
+    target = physical_name or table_name
+    statements = []
+    for cols in TABLE_INDEXES.get(table_name, []):
+        statements.append(f"CREATE INDEX IF NOT EXISTS {target}_{'_'.join(cols)}_idx ON {target} ({', '.join(cols)});")
+    for col in UNIQUE_INDEXES.get(table_name, []):
+        statements.append(f"CREATE UNIQUE INDEX IF NOT EXISTS {target}_{col}_idx ON {target} ({col});")
+    if TRIGRAM_INDEXES.get(table_name):
+        statements.append("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    for col in TRIGRAM_INDEXES.get(table_name, []):
+        statements.append(f"CREATE INDEX IF NOT EXISTS {target}_{col}_idx ON {target} USING gin ({col} gin_trgm_ops);")
+    return statements
+
+def create_table_sql(table_name, df):
+    """CREATE TABLE (+ indexes) for a sheet frame whose columns are already cleaned."""
+    lines = [
+        f"CREATE TABLE IF NOT EXISTS {table_name} (",
+        "  id bigint generated by default as identity primary key,",
+        "  created_at timestamp with time zone default timezone('utc'::text, now()) not null,",
+    ]
+    for col in df.columns:
+        sql_type = get_sql_type(df[col].dtype, col)
+        # Avoid reserved words or conflicts if necessary, but Supabase is usually forgiving
+        lines.append(f"  {col} {sql_type},")
+    lines[-1] = lines[-1].rstrip(",")
+    lines.append(");")
+    return "\n".join(lines + index_statements(table_name))
+
 def generate_schema(sheet_name, table_name):
+    from app.services.gsheets import load_data as load_gsheets  # needs secrets.toml
+
     try:
         df = load_gsheets(sheet_name)
     except Exception as e:
@@ -45,20 +105,78 @@ def generate_schema(sheet_name, table_name):
     df.columns = [clean_column_name(c) for c in df.columns]
     
     print(f"\n-- Table: {table_name}")
-    print(f"CREATE TABLE IF NOT EXISTS {table_name} (")
-    print("  id bigint generated by default as identity primary key,")
-    print("  created_at timestamp with time zone default timezone('utc'::text, now()) not null,")
-    
-    for col in df.columns:
-        sql_type = get_sql_type(df[col].dtype)
-        # Avoid reserved words or conflicts if necessary, but Supabase is usually forgiving
-        print(f"  {col} {sql_type},")
-    
-    print(");")
+    print(create_table_sql(table_name, df))
     print(f"alter table {table_name} enable row level security;")
     print("-- Policy: Allow all access for now (Development)")
     print(f"create policy \"Enable all for {table_name}\" on {table_name} for all using (true) with check (true);")
 
+def generate_snapshot_schema():
+    # master_schedule is double-buffered: readers follow table_pointers to the active copy,
+    # publication fills the other copy and flips the pointer (see supabase_db.publish_snapshot)
+    print("\n-- Snapshot publication for master_schedule")
+    print("CREATE TABLE IF NOT EXISTS master_schedule_b (LIKE master_schedule INCLUDING ALL);")
+    for statement in index_statements("master_schedule", "master_schedule_b"):
+        print(statement)
+    print("alter table master_schedule_b enable row level security;")
+    print("create policy \"Enable all for master_schedule_b\" on master_schedule_b for all using (true) with check (true);")
+    print("CREATE TABLE IF NOT EXISTS table_pointers (")
+    print("  logical_name text primary key,")
+    print("  physical_name text not null,")
+    print("  snapshot_id text,")
+    print("  previous_physical_name text,")
+    print("  previous_snapshot_id text,")
+    print("  published_at timestamp with time zone default timezone('utc'::text, now()) not null,")
+    print("  row_count bigint,")
+    print("  snapshot_meta jsonb default '{}'::jsonb")
+    print(");")
+    print("alter table table_pointers enable row level security;")
+    print("create policy \"Enable all for table_pointers\" on table_pointers for all using (true) with check (true);")
+
+def generate_schedule_runs_schema():
+    # One row per schedule write with the seed it was generated from (see supabase_db.log_schedule_run)
+    print("\n-- Schedule run log (seeds of generated schedules)")
+    print("CREATE TABLE IF NOT EXISTS schedule_runs (")
+    print("  id bigint generated by default as identity primary key,")
+    print("  created_at timestamp with time zone default timezone('utc'::text, now()) not null,")
+    print("  mode text not null,")
+    print("  seed bigint not null,")
+    print("  mr_id text,")
+    print("  window_start date,")
+    print("  window_end date,")
+    print("  rows_written bigint,")
+    print("  run_meta jsonb default '{}'::jsonb")
+    print(");")
+    print("alter table schedule_runs enable row level security;")
+    print("create policy \"Enable all for schedule_runs\" on schedule_runs for all using (true) with check (true);")
+
+def generate_daily_schedule_function():
+    # One-round-trip merged daily view used by /schedule/daily (see supabase_db.fetch_daily_rows)
+    print("\n-- Merged daily schedule (Activities over Master_Schedule) for the MR app")
+    print(DAILY_SCHEDULE_FUNCTION_SQL.strip())
+
+def generate_index_migration():
+    # For databases created before dates were typed and indexed: convert the text `date`
+    # columns (run scripts/check_date_format.py first, every value must be YYYY-MM-DD) and
+    # add the hot-path indexes. The unique activity_id index fails while duplicates exist
+    # (see scripts/cleanup_dups.py).
+    print("\n-- Migration: typed dates + hot-path indexes")
+    for table_name in TABLE_INDEXES:
+        for physical in [table_name] + TABLE_COPIES.get(table_name, []):
+            print(f"ALTER TABLE {physical} ALTER COLUMN date TYPE date USING NULLIF(trim(date::text), '')::date;")
+            for statement in index_statements(table_name, physical):
+                print(statement)
+    print("ANALYZE master_schedule; ANALYZE master_schedule_b; ANALYZE activities;")
+
+def generate_upsert_key_migration():
+    # save_data(mode="upsert") writes with ON CONFLICT on the key column, which Postgres rejects
+    # without a unique index on it. The index fails while duplicate keys exist (find them with
+    # scripts/analyze_dups.py).
+    print("\n-- Migration: unique upsert keys")
+    for table_name, cols in UNIQUE_INDEXES.items():
+        for physical in [table_name] + TABLE_COPIES.get(table_name, []):
+            for col in cols:
+                print(f"CREATE UNIQUE INDEX IF NOT EXISTS {physical}_{col}_idx ON {physical} ({col});")
+
 def main():
     target = sys.argv[1] if len(sys.argv) > 1 else None
     print("-- RUN THIS SQL IN SUPABASE SQL EDITOR --")
@@ -66,6 +184,16 @@ def main():
         if target and table != target:
             continue
         generate_schema(sheet, table)
+    if not target or target == "master_schedule":
+        generate_snapshot_schema()
+    if not target or target in ("master_schedule", "schedule_runs"):
+        generate_schedule_runs_schema()
+    if not target or target == DAILY_SCHEDULE_RPC:
+        generate_daily_schedule_function()
+    if target == "indexes":
+        generate_index_migration()
+    if target == "upsert_keys":
+        generate_upsert_key_migration()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.logic import haversine_matrix, ROAD_FACTOR, AVG_SPEED_KMH
+
+# Minimal local stand-in for the OSRM HTTP API (/route and /table, driving profile).
+# Distances are haversine x ROAD_FACTOR, so results are deterministic and need no network.
+# Usage: python scripts/osrm_stub_server.py [port]   then   OSRM_HOST=http://localhost:5000
+
+REQUEST_COUNTS = {"route": 0, "table": 0}
+
+
+def parse_coords(path):
+    coords = path.rsplit("/", 1)[-1]
+    points = [c.split(",") for c in coords.split(";")]
+    lons = [float(p[0]) for p in points]
+    lats = [float(p[1]) for p in points]
+    return lats, lons
+
+
+class OSRMStubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            lats, lons = parse_coords(url.path)
+        except (ValueError, IndexError):
+            return self.reply(400, {"code": "InvalidQuery"})
+
+        meters = haversine_matrix(lats, lons) * ROAD_FACTOR * 1000
+        seconds = meters / (AVG_SPEED_KMH * 1000 / 3600)
+
+        if url.path.startswith("/route/v1/"):
+            REQUEST_COUNTS["route"] += 1
+            total_m = sum(meters[i, i + 1] for i in range(len(lats) - 1))
+            total_s = sum(seconds[i, i + 1] for i in range(len(lats) - 1))
+            return self.reply(200, {"code": "Ok", "routes": [{"distance": total_m, "duration": total_s}]})
+
+        if url.path.startswith("/table/v1/"):
+            REQUEST_COUNTS["table"] += 1
+            return self.reply(200, {"code": "Ok", "distances": meters.tolist(), "durations": seconds.tolist()})
+
+        return self.reply(404, {"code": "InvalidUrl"})
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep test output quiet
+
+
+def start_stub_server(port=0):
+    """Start the stub in a daemon thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), OSRMStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    server, base_url = start_stub_server(port)
+    print(f"OSRM stub listening on {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
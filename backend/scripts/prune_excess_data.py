@@ -7,40 +7,28 @@ from collections import defaultdict
 # Add parent directory to path to import app modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.services.supabase_db import supabase
+from app.services.supabase_db import supabase, iter_data, resolve_table
 
 MAX_VISITS_PER_DAY = 15
 
 def fetch_all_rows(table_name):
-    """Fetch all rows using pagination"""
-    all_data = []
-    chunk_size = 1000
-    start = 0
-    
-    while True:
-        print(f"Fetching {table_name} rows {start} to {start+chunk_size}...", end='\r')
-        response = supabase.table(table_name).select("id, mr_id, date").range(start, start + chunk_size - 1).execute()
-        data = response.data
-        if not data:
-            break
-        all_data.extend(data)
-        if len(data) < chunk_size:
-            break
-        start += chunk_size
-    print() # Newline
-    return all_data
+    """Fetch all rows of a physical table using pagination (read errors propagate)"""
+    print(f"Fetching {table_name} rows...")
+    chunks = list(iter_data(table_name, columns=["id", "mr_id", "date"], resolve=False))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
 
 def prune_table(table_name, date_col='date'):
+    # Snapshot tables (master_schedule) are double-buffered: read and delete the active copy
+    table_name = resolve_table(table_name)
     print(f"\n--- Pruning {table_name} ---")
     
     # Fetch all data using pagination
-    data = fetch_all_rows(table_name)
+    df = fetch_all_rows(table_name)
     
-    if not data:
+    if df.empty:
         print("No data found.")
         return
 
-    df = pd.DataFrame(data)
     print(f"Total rows: {len(df)}")
     
     # Group by MR and Date
@@ -0,0 +1,109 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.logic import LOC_ZONE_MAP, SPECIALITIES
+
+# Synthetic users / contacts / activities frames shaped like the Supabase tables, shared by the
+# benchmarks and test scripts. Nothing touches Supabase: frames are generated in memory.
+# Imported, not run: from synthetic_fleet import make_fleet
+
+SEGMENTS = ['Peripheral Supporter', 'Silent Referrer', 'Key Influencer', 'Loyal Advocate']
+ZONES = sorted(set(LOC_ZONE_MAP.values()))
+
+# Locality centres: DOCTOR_DB coordinates (scripts/generate_smart_schedule.py) where it has the
+# locality, approximate centroids for the rest of LOC_ZONE_MAP
+LOCALITY_COORDS = {
+    'Bapunagar': (23.0350, 72.6300), 'Bopal': (23.0289, 72.4633), 'Chandlodiya': (23.0850, 72.5550),
+    'Ellisbridge': (23.0220, 72.5650), 'Ghatlodiya': (23.0700, 72.5450), 'Ghodasar': (22.9750, 72.6100),
+    'Ghuma': (23.0250, 72.4450), 'Gota': (23.1000, 72.5400), 'Isanpur': (22.9800, 72.6000),
+    'Maninagar': (22.9960, 72.6030), 'Memnagar': (23.0500, 72.5350), 'Naroda Road': (23.0550, 72.6350),
+    'Nikol': (23.0450, 72.6650), 'Odhav': (23.0300, 72.6700), 'Ognaj': (23.1000, 72.5100),
+    'Paldi': (23.0120, 72.5610), 'Rakhial': (23.0250, 72.6250), 'SG Highway': (23.0240, 72.5080),
+    'Saraspur': (23.0350, 72.6100), 'Satellite': (23.0300, 72.5200), 'Science City': (23.0780, 72.4950),
+    'Sola': (23.0782, 72.5098), 'Thaltej': (23.0640, 72.5080), 'Vaishnodevi': (23.1350, 72.5350),
+    'Vasna': (23.0000, 72.5500), 'Vastral': (23.0000, 72.6600), 'Vastrapur': (23.0425, 72.5256),
+    'Vatva': (22.9550, 72.6250),
+}
+FIRST_NAMES = ['Aarav', 'Sneha', 'Rohan', 'Priya', 'Vikram', 'Anita', 'Rajesh', 'Meera']
+LAST_NAMES = ['Patel', 'Shah', 'Mehta', 'Desai', 'Singh', 'Roy', 'Kumar', 'Joshi']
+INSTITUTIONS = ['Hospital', 'Clinic', 'Nursing Home', 'Health Centre']
+JITTER_DEG = 0.01  # ~1 km around the locality centre
+
+
+def contact_names(rng, n):
+    first = rng.choice(FIRST_NAMES, n)
+    last = rng.choice(LAST_NAMES, n)
+    kind = rng.choice(INSTITUTIONS, n)
+    is_doctor = rng.random(n) < 0.7
+    return np.where(is_doctor, np.char.add(np.char.add("Dr. ", first), np.char.add(" ", last)),
+                    np.char.add(np.char.add(last, " "), kind))
+
+
+def make_fleet(n_mrs, contacts_per_zone=400, activities_per_contact=8, seed=7,
+               n_contacts=None, n_activities=None, localities=False):
+    """
+    (users, contacts, activities) for n_mrs MRs spread round-robin over the zones.
+    Sizes: contacts_per_zone contacts per zone and activities_per_contact activities per contact,
+    unless n_contacts / n_activities give totals.
+    localities=True places MRs and contacts around real locality centres (so zones are
+    geographic and names realistic); by default everyone sits in one ~10 km box.
+    """
+    rng = np.random.default_rng(seed)
+    user_zones = [ZONES[i % len(ZONES)] for i in range(n_mrs)]
+    n_contacts = n_contacts or contacts_per_zone * len(ZONES)
+
+    if localities:
+        names = sorted(LOCALITY_COORDS)
+        by_zone = {zone: [loc for loc in names if LOC_ZONE_MAP[loc] == zone] for zone in ZONES}
+        home = np.array([LOCALITY_COORDS[rng.choice(by_zone[zone])] for zone in user_zones]).reshape(-1, 2)
+        start_lat = home[:, 0] + rng.normal(0, JITTER_DEG, n_mrs)
+        start_lon = home[:, 1] + rng.normal(0, JITTER_DEG, n_mrs)
+        contact_locs = rng.choice(names, n_contacts)
+        centres = np.array([LOCALITY_COORDS[loc] for loc in contact_locs])
+        contact_zones = [LOC_ZONE_MAP[loc] for loc in contact_locs]
+        contact_lat = centres[:, 0] + rng.normal(0, JITTER_DEG, n_contacts)
+        contact_lon = centres[:, 1] + rng.normal(0, JITTER_DEG, n_contacts)
+        contact_labels = contact_names(rng, n_contacts)
+    else:
+        start_lat = 23.0 + rng.random(n_mrs) * 0.1
+        start_lon = 72.5 + rng.random(n_mrs) * 0.1
+        contact_locs = 'Synthetic'
+        contact_zones = [ZONES[i % len(ZONES)] for i in range(n_contacts)]
+        contact_lat = 23.0 + rng.random(n_contacts) * 0.1
+        contact_lon = 72.5 + rng.random(n_contacts) * 0.1
+        contact_labels = [f"Dr. {i}" for i in range(n_contacts)]
+
+    users = pd.DataFrame({
+        'mr_id': [f"MR{i:04d}" for i in range(n_mrs)],
+        'name': [f"MR {i}" for i in range(n_mrs)],
+        'zone': user_zones,
+        'team': 'General',
+        'starting_latitude': start_lat,
+        'starting_longitude': start_lon,
+    })
+    contacts = pd.DataFrame({
+        'Contact_id': [f"C{i:07d}" for i in range(n_contacts)],
+        'Contact_name': contact_labels,
+        'Speciality': rng.choice(SPECIALITIES, n_contacts),
+        'Segment': rng.choice(SEGMENTS, n_contacts),
+        'Locality': contact_locs,
+        'Zone': contact_zones,
+        'Latitude': contact_lat,
+        'Longitude': contact_lon,
+    })
+
+    n_acts = n_activities or n_contacts * activities_per_contact
+    dates = pd.Timestamp.now().normalize() - pd.to_timedelta(rng.integers(1, 365, n_acts), unit='D')
+    activities = pd.DataFrame({
+        'customer_id': rng.choice(contacts['Contact_id'].to_numpy(), n_acts),
+        'mr_id': rng.choice(users['mr_id'].to_numpy(), n_acts),
+        'date': dates.strftime('%Y-%m-%d'),
+        'referrals_count': rng.integers(0, 15, n_acts),
+        'visit_count': rng.integers(0, 10, n_acts),
+    })
+    return users, contacts, activities
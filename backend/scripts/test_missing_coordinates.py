@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Isolated leg cache and model dir so the check never touches real data
+os.environ["TRAVEL_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "travel_cache.sqlite3")
+os.environ["MODEL_DIR"] = tempfile.mkdtemp()
+
+from osrm_stub_server import start_stub_server
+from synthetic_fleet import make_fleet
+from app.services import logic
+
+# Contacts / MR start points with missing lat/lon must get the default 5 km / 15 min leg on
+# every routing path instead of NaN (which used to abort the whole fleet run).
+# Usage: python scripts/test_missing_coordinates.py
+
+
+def finite(matrices):
+    return all(np.isfinite(m).all() for m in matrices)
+
+
+def main():
+    server, base_url = start_stub_server()
+    logic.OSRM_BASE_URL = f"{base_url}/route/v1/driving/"
+    logic.OSRM_TABLE_URL = f"{base_url}/table/v1/driving/"
+
+    lats, lons = [23.01, None, 23.05, float("nan")], [72.51, 72.52, 72.55, 72.56]
+    checks = {
+        "estimate_travel": logic.estimate_travel(23.0, None, 23.1, 72.5) == (logic.DEFAULT_LEG_KM, logic.DEFAULT_LEG_MIN),
+        "get_travel_distance": logic.get_travel_distance(float("nan"), 72.5, 23.1, 72.5) == (logic.DEFAULT_LEG_KM, logic.DEFAULT_LEG_MIN),
+        "haversine matrix": finite(logic.HaversineBackend().matrix(lats, lons)),
+        "osrm matrix": finite(logic.OSRMBackend().matrix(lats, lons)),
+    }
+    dist, _ = logic.OSRMBackend().matrix(lats, lons)
+    checks["default leg for missing point"] = dist[0, 1] == logic.DEFAULT_LEG_KM and dist[1, 1] == 0.0
+
+    # One contact without coordinates and one MR without a start point, scheduled end to end
+    users, contacts, activities = make_fleet(3, contacts_per_zone=20, activities_per_contact=2)
+    contacts.loc[0, ['Latitude', 'Longitude']] = [None, None]
+    contacts.loc[1, 'Latitude'] = None
+    users.loc[0, 'starting_latitude'] = np.nan
+    for backend in ("haversine", "osrm"):
+        logic.zone_cache.clear()
+        try:
+            schedules = logic.run_schedule_logic_for_fleet(
+                users, contacts, activities, pd.Timestamp("2026-01-29"), routing=backend, seed=1
+            )
+            merged = pd.concat(schedules, ignore_index=True)
+            checks[f"fleet run ({backend})"] = len(merged) > 0 and merged['travel_duration_min'].notna().all()
+        except Exception as e:
+            print(f"   {backend} fleet run failed: {type(e).__name__}: {e}")
+            checks[f"fleet run ({backend})"] = False
+
+    server.shutdown()
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Isolated leg cache so the check always exercises the HTTP path first
+os.environ["TRAVEL_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "travel_cache.sqlite3")
+
+from osrm_stub_server import start_stub_server, REQUEST_COUNTS
+from app.services import logic
+
+
+def main():
+    server, base_url = start_stub_server()
+    logic.OSRM_BASE_URL = f"{base_url}/route/v1/driving/"
+    logic.OSRM_TABLE_URL = f"{base_url}/table/v1/driving/"
+    print(f"Stub OSRM at {base_url}")
+
+    # Start location + 8 stops, like one MR-day
+    rng = np.random.default_rng(7)
+    lats = list(23.0 + rng.random(9) * 0.1)
+    lons = list(72.5 + rng.random(9) * 0.1)
+
+    backend = logic.get_routing_backend("osrm")
+    dist, dur = backend.matrix(lats, lons)
+    print(f"Table requests: {REQUEST_COUNTS['table']} (expected 1), route requests: {REQUEST_COUNTS['route']}")
+
+    # Every matrix cell must agree with the per-leg /route answer
+    mismatches = 0
+    for i in range(len(lats)):
+        for j in range(len(lats)):
+            if i == j:
+                continue
+            logic.travel_cache.clear()
+            leg = logic.get_travel_distance(lats[i], lons[i], lats[j], lons[j])
+            if abs(leg[0] - dist[i, j]) > 0.01 or abs(leg[1] - dur[i, j]) > 0.1:
+                mismatches += 1
+    print(f"Matrix vs /route mismatches: {mismatches}")
+
+    # Second matrix for the same points must be served from the leg cache
+    logic.travel_cache.clear()
+    backend.matrix(lats, lons)
+    before = REQUEST_COUNTS["table"]
+    backend.matrix(lats, lons)
+    print(f"Cached re-request made {REQUEST_COUNTS['table'] - before} table calls (expected 0)")
+
+    server.shutdown()
+    ok = mismatches == 0 and REQUEST_COUNTS["table"] == before
+    print("✅ OSRM table OK" if ok else "❌ OSRM table check failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import json
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.supabase_db import serialize_chunks, _to_records, _row_key
+
+# Rows written by bulk_write must come back from JSON exactly as the dict-based path sent them:
+# coordinates used to be cut to 10 decimals, so every diff-aware upsert saw them as changed.
+# Usage: python scripts/test_serialize_roundtrip.py
+
+CHUNK_SIZE = 7
+
+
+def schedule_frame(n=50, seed=3):
+    """Master_Schedule-shaped rows: coordinates at up to 14 decimals, rounded legs, dates, gaps."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'activity_id': [f"ACT_MR{i:03d}_{i:06x}" for i in range(n)],
+        'date': [dt.date(2026, 10, 19) + dt.timedelta(days=int(d)) for d in rng.integers(0, 30, n)],
+        'latitude': [round(v, int(d)) for v, d in zip(23.0 + rng.random(n) * 0.2, rng.integers(4, 15, n))],
+        'longitude': [round(v, int(d)) for v, d in zip(72.5 + rng.random(n) * 0.2, rng.integers(4, 15, n))],
+        'distance_km': np.round(rng.random(n) * 20, 2),
+        'travel_duration_min': np.round(rng.random(n) * 45, 1),
+        'duration_min': rng.integers(15, 46, n),
+        'status': 'Pending',
+    })
+    df.loc[3, ['latitude', 'longitude']] = np.nan
+    df.loc[5, 'status'] = None
+    return df
+
+
+def is_null(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def same(a, b):
+    return (is_null(a) and is_null(b)) or a == b
+
+
+def serialized(df):
+    rows = []
+    for _, _, payload in serialize_chunks(df, CHUNK_SIZE):
+        rows.extend(json.loads(payload))
+    return rows
+
+
+def main():
+    checks = {}
+
+    # 1. Same values as json.dumps of the old list-of-dicts payload
+    df = schedule_frame()
+    expected = json.loads(json.dumps(_to_records(df), default=str))
+    got = serialized(df)
+    mismatches = [(e['activity_id'], col) for e, g in zip(expected, got) for col in e if not same(e[col], g.get(col))]
+    for activity_id, col in mismatches[:5]:
+        print(f"   {activity_id}.{col} changed in transit")
+    checks["schedule rows round-trip exactly"] = len(got) == len(expected) and not mismatches
+
+    # 2. Full-precision doubles may move in the last digit, but the upsert diff must not see it
+    rng = np.random.default_rng(11)
+    full = pd.DataFrame({'activity_id': [f"A{i}" for i in range(1000)], 'latitude': rng.uniform(-90, 90, 1000)})
+    got = serialized(full)
+    checks["full-precision doubles within 1e-12"] = bool(np.allclose(
+        [r['latitude'] for r in got], full['latitude'], rtol=0, atol=1e-12))
+    checks["upsert diff sees no change"] = all(
+        _row_key(r, ['latitude']) == _row_key(e, ['latitude']) for r, e in zip(got, _to_records(full)))
+
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import os
+import sys
+import pandas as pd
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.supabase_db import load_data
+from app.services.logic import (
+    prepare_activities, build_customer_features, prepare_scoring_frame, compute_data_version
+)
+from app.services.model_registry import model_registry
+
+# Train (or reuse) the priority model for the current data snapshot, off the request path.
+# Run after bulk data loads; the API picks up models/latest.json at startup.
+
+
+def main():
+    contacts = load_data("Contacts")
+    activities = load_data("Activities")
+    if contacts.empty:
+        print("❌ Contacts table is empty, nothing to train on.")
+        return
+
+    current_date = pd.Timestamp.now().normalize()
+    features = build_customer_features(prepare_activities(activities), current_date)
+    frame = prepare_scoring_frame(contacts, features)
+
+    snapshot = compute_data_version(contacts, activities)
+    model = model_registry.get_model(snapshot, frame)
+    print(f"✅ Model {model.snapshot} ready ({model.n_rows} training rows) in {model_registry.model_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import api from '../lib/api';
 import { useAuth } from '../context/AuthContext';
 import { Loader2, RefreshCw, AlertCircle, ChevronLeft, ChevronRight, FileText, Database } from 'lucide-react';
@@ -12,6 +12,11 @@ export default function AdminDashboard() {
   const [generating, setGenerating] = useState(false);
   const [progress, setProgress] = useState(0);
   const [statusMessage, setStatusMessage] = useState('');
+  const [jobId, setJobId] = useState(null);
+  const pollRef = useRef(null);
+  // Latest table for callbacks that outlive a render (the job poll interval)
+  const selectedTableRef = useRef(selectedTable);
+  selectedTableRef.current = selectedTable;
 
   // Pagination
   const [page, setPage] = useState(1);
@@ -24,7 +29,7 @@ export default function AdminDashboard() {
     setLoading(true);
     setError(null);
     try {
-      const response = await api.get(`/admin/table/${selectedTable}`, {
+      const response = await api.get(`/admin/table/${selectedTableRef.current}`, {
         params: {
           page: newPage,
           page_size: pageSize,
@@ -41,6 +46,57 @@ export default function AdminDashboard() {
     }
   };
 
+  const stopPolling = () => {
+    if (pollRef.current) {
+      clearInterval(pollRef.current);
+      pollRef.current = null;
+    }
+  };
+
+  const pollJob = (id) => {
+    stopPolling();
+    pollRef.current = setInterval(async () => {
+      try {
+        const { data: job } = await api.get(`/admin/jobs/${id}`);
+        if (job.mrs_total > 0) {
+          setProgress(Math.round(job.progress * 100));
+          const eta = job.eta_seconds != null ? ` · ~${Math.ceil(job.eta_seconds)}s left` : '';
+          setStatusMessage(`${job.mrs_done}/${job.mrs_total} MRs · ${job.rows} activities${eta}`);
+        } else if (job.message) {
+          setStatusMessage(job.message);
+        }
+        if (job.stage === 'publishing') {
+          setStatusMessage(job.message || 'Publishing schedule...');
+        }
+
+        if (job.status === 'succeeded') {
+          stopPolling();
+          setProgress(100);
+          setStatusMessage(job.result?.message || 'Schedule generated successfully!');
+          setGenerating(false);
+          setJobId(null);
+          if (selectedTableRef.current === 'Master_Schedule') {
+            fetchTableData(1);
+          }
+        } else if (job.status === 'failed' || job.status === 'cancelled') {
+          stopPolling();
+          if (job.status === 'failed') {
+            setError(job.error || 'Failed to generate schedule');
+          }
+          setStatusMessage(job.status === 'cancelled' ? 'Generation cancelled' : 'Generation failed');
+          setProgress(0);
+          setGenerating(false);
+          setJobId(null);
+        }
+      } catch (err) {
+        stopPolling();
+        setError(err.response?.data?.detail || 'Lost track of the generation job');
+        setGenerating(false);
+        setJobId(null);
+      }
+    }, 1500);
+  };
+
   const generateSchedule = async () => {
     if (!window.confirm('Generate new schedule for all MRs? This will overwrite Master_Schedule.')) {
       return;
@@ -51,29 +107,45 @@ export default function AdminDashboard() {
     setProgress(0);
     setStatusMessage('Initializing schedule generation...');
 
-    const interval = setInterval(() => {
-      setProgress((prev) => (prev >= 90 ? prev : prev + 10));
-    }, 800);
-
     try {
       const response = await api.post('/admin/generate-schedule');
-      clearInterval(interval);
-      setProgress(100);
-      setStatusMessage(response.data.message || 'Schedule generated successfully!');
-
-      if (selectedTable === 'Master_Schedule') {
-        fetchTableData(1);
-      }
+      setJobId(response.data.job_id);
+      setStatusMessage(response.data.message || 'Schedule generation started');
+      pollJob(response.data.job_id);
     } catch (err) {
-      clearInterval(interval);
       setError(err.response?.data?.detail || 'Failed to generate schedule');
       setStatusMessage('Generation failed');
       setProgress(0);
-    } finally {
       setGenerating(false);
     }
   };
 
+  const cancelGeneration = async () => {
+    if (!jobId) return;
+    try {
+      await api.post(`/admin/jobs/${jobId}/cancel`);
+      setStatusMessage('Cancelling...');
+    } catch (err) {
+      setError(err.response?.data?.detail || 'Failed to cancel generation');
+    }
+  };
+
+  // Resume polling if a generation job is already running (e.g. after a page reload)
+  useEffect(() => {
+    api.get('/admin/jobs', { params: { kind: 'generate-schedule' } })
+      .then(({ data: jobs }) => {
+        const running = jobs.find((job) => job.status === 'queued' || job.status === 'running');
+        if (running) {
+          setGenerating(true);
+          setJobId(running.job_id);
+          setStatusMessage('Resuming schedule generation...');
+          pollJob(running.job_id);
+        }
+      })
+      .catch(() => {});
+    return stopPolling;
+  }, []);
+
   useEffect(() => {
     setPage(1);
     fetchTableData(1);
@@ -150,6 +222,16 @@ export default function AdminDashboard() {
               <p className="text-center text-sm font-bold text-zinc-900 dark:text-zinc-100">
                 {statusMessage}
               </p>
+              {jobId && (
+                <div className="flex justify-center">
+                  <button
+                    onClick={cancelGeneration}
+                    className="px-4 py-1.5 rounded-lg text-xs font-bold border border-zinc-300 dark:border-zinc-700 text-zinc-700 dark:text-zinc-300 hover:bg-zinc-100 dark:hover:bg-zinc-800 transition-all"
+                  >
+                    Cancel
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>